@@ -9,24 +9,39 @@ Usage:
 """
 import argparse
 
-from xpertcorpus.utils import xlogger
-from xpertcorpus.modules.frameworks.xframe_pt import XFramework_PT
 
-def main():
-    # Parse arguments
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command line argument parser.
+
+    Returns:
+        The argument parser of the XpertCorpus entry point
+    """
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", "-i", type=str, default="./data/20250710-1750_raw_content_test_1.jsonl", help="The input file path, or the raw files directory path.")
     parser.add_argument("--output", "-o", type=str, default="./output", help="The output directory path.")
     parser.add_argument("--max_workers", "-m", type=int, default=1, help="The number of workers.")
     parser.add_argument("--limit", "-l", type=int, default=0, help="The number of limit, 0 means no limit.")
-    args = parser.parse_args()
+    parser.add_argument("--raw_output_format", type=str, default="jsonl", choices=["jsonl", "arrow"], help="The output format of the preprocessed raw corpus (only used when the input is a raw files directory).")
+    return parser
+
+
+def main():
+    # Parse arguments
+    args = build_parser().parse_args()
+
+    # Import heavy modules only after parsing, so `--help` and argument errors return immediately
+    # (note that `xpertcorpus.utils` loads the tokenizer on import, so xlogger is imported here too)
+    from xpertcorpus.utils import xlogger
+    from xpertcorpus.modules.frameworks.xframe_pt import XFramework_PT
 
     # Initialize framework
     framework = XFramework_PT(
         input_file=args.input,
         output_dir=args.output,
         max_workers=args.max_workers,
-        limit=args.limit
+        limit=args.limit,
+        config={"processing": {"raw_output_format": args.raw_output_format}}
     )
 
     # Run framework
@@ -11,17 +11,310 @@ Usage:
 @date:   2025-08-13
 """
 import os
-import json
+import re
+import copy
+import mmap
+import logging
+import multiprocessing
+import stat
+import orjson
+import shelve
+import xxhash
+import contextlib
 
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, MutableMapping, Optional, Pattern, Tuple
 from datetime import datetime
-from xpertcorpus.utils import xlogger, error_handler, safe_execute, count_tokens
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from xpertcorpus.utils import xlogger, error_handler, count_tokens_batch, xtokenizer
 from xpertcorpus.modules.operators import XTextSplitter, XLlmCleaner
 from xpertcorpus.modules.others.xlimitor import XLimitor
 from xpertcorpus.modules.others.xframework import FrameworkABC, FrameworkType, FrameworkState, register_framework
 from xpertcorpus.modules.pipelines.xcleaning_pipe import XCleaningPipe
 
 
+# Buffer size of the raw corpus output files
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Maximum number of raw files tokenized together in one batch
+_TOKENIZE_BATCH_SIZE = 64
+
+# Number of in-flight batches per worker process
+_PENDING_BATCHES_PER_WORKER = 4
+
+# Maximum number of threads reading raw files concurrently
+_MAX_IO_WORKERS = 32
+
+# Number of raw files between two progress log lines
+_PROGRESS_LOG_INTERVAL = 100
+
+# Raw files larger than this (in bytes) are memory-mapped instead of read()
+_MMAP_THRESHOLD = 256 * 1024
+
+# Supported formats of the preprocessed raw corpus file
+_RAW_OUTPUT_FORMATS = ("jsonl", "arrow")
+
+# Number of rows per record batch in the Arrow raw corpus output
+_ARROW_BATCH_ROWS = 256
+
+# File name (in the output directory) of the persistent raw corpus token count cache
+_TOKEN_CACHE_FILE_NAME = ".token_cache"
+
+# Default configuration of XFramework_PT, overridden by the `config` passed to it
+_DEFAULT_PT_CONFIG: Dict[str, Any] = {
+    # Text splitter configuration
+    "text_splitter": {
+        "chunk_size": 512,
+        "chunk_overlap": 200,
+        "split_method": "markdown",  # or "semantic"
+        "min_tokens_per_chunk": 20
+    },
+    # LLM cleaner configuration
+    "llm_cleaner": {
+        "enable_token_tracking": True,
+        "reset_tokens_on_start": True
+    },
+    # Storage configuration
+    "storage": {
+        "enable_compression": False,
+        "validate_on_write": True,
+        "cache_type": "jsonl"
+    },
+    # Processing configuration
+    "processing": {
+        "auto_detect_raw_corpus": True,
+        "supported_extensions": [".txt", ".md"],
+        "exclude_patterns": [".bak"],
+        "raw_output_format": "jsonl",  # or "arrow"
+        "token_cache": False  # persist raw corpus token counts in the output directory
+    }
+}
+
+
+def _iter_corpus_files(root: str, extensions: Tuple[str, ...], exclude_re: Optional[Pattern[str]]) -> Iterator[str]:
+    """
+    Walk a raw corpus directory and yield paths of supported files.
+    
+    Uses an explicit `os.scandir` stack instead of `os.walk`: entry types come
+    from the cached readdir data, and the extension test runs on the entry name
+    before any further work is done for the entry. Only regular files (or
+    symlinks to them) are yielded, so FIFOs or devices never block a reader.
+    
+    Args:
+        root: Raw corpus directory
+        extensions: Supported file extensions (e.g. (".txt", ".md"))
+        exclude_re: Compiled exclude pattern; any path it matches is skipped, None skips nothing
+        
+    Yields:
+        Paths of the files to process
+    """
+    exclude_search = exclude_re.search if exclude_re is not None else None
+    stack = [root]
+    while stack:
+        subdirs = []
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    # Excluded directories are pruned together with their contents
+                    if exclude_search is None or not exclude_search(entry.path):
+                        subdirs.append(entry.path)
+                elif entry.name.endswith(extensions) and entry.is_file():
+                    if exclude_search is None or not exclude_search(entry.path):
+                        yield entry.path
+        # Pushed in reverse, so the subdirectories are walked depth-first in listing
+        # order after the files of their parent: the same file order as os.walk
+        stack.extend(reversed(subdirs))
+
+
+def _iter_batches(items: Iterable[str], max_batch_size: int) -> Iterator[List[str]]:
+    """
+    Group items into lists whose size doubles from 1 up to `max_batch_size`.
+    
+    Small leading batches get the first results out (and every worker busy)
+    quickly, large trailing batches amortize the per-batch overhead.
+    
+    Args:
+        items: Items to group
+        max_batch_size: Upper bound of the batch size
+        
+    Yields:
+        Lists of consecutive items
+    """
+    batch = []
+    batch_size = 1
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+            batch_size = min(batch_size * 2, max_batch_size)
+    if batch:
+        yield batch
+
+
+def _imap_ordered(executor: Executor, fn: Callable, items: Iterable, max_pending: int) -> Iterator:
+    """
+    Lazy, order-preserving `executor.map` with a bounded number of pending tasks.
+    
+    `Executor.map` submits the whole input up front, which would drain a lazy
+    input (such as a directory walk) before the first result is available.
+    
+    Args:
+        executor: Executor to submit to
+        fn: Function applied to every item
+        items: Input items, consumed lazily
+        max_pending: Maximum number of submitted but unconsumed tasks
+        
+    Yields:
+        fn(item) for every item, in input order
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _read_text_file(file_path: str) -> str:
+    """
+    Read a UTF-8 text file with universal newlines.
+    
+    Large files are memory-mapped and decoded straight from the mapping, so
+    the only full-size copy held in memory is the decoded string itself. The
+    kernel is told to read them ahead sequentially and to drop their pages from
+    the page cache afterwards, so a corpus larger than RAM does not evict the
+    working set of the later stages.
+    
+    Args:
+        file_path: Path to the text file
+        
+    Returns:
+        File content
+    """
+    with open(file_path, "rb") as infile:
+        if os.fstat(infile.fileno()).st_size <= _MMAP_THRESHOLD:
+            with open(infile.fileno(), "r", encoding="utf-8", closefd=False) as text_file:
+                return text_file.read()
+        
+        with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            content = str(mm, "utf-8")
+        
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(infile.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    
+    # Match the newline translation of text-mode reads
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content
+
+
+def _read_text_files(file_paths: List[str]) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Read a batch of raw corpus files, never raising.
+
+    Args:
+        file_paths: Paths to the raw text/markdown files
+
+    Returns:
+        List of (file_path, content, error) tuples in input order, where content
+        is None and error holds the message if a file could not be read
+    """
+    results = []
+    for file_path in file_paths:
+        try:
+            results.append((file_path, _read_text_file(file_path), None))
+        except Exception as e:
+            results.append((file_path, None, str(e)))
+    return results
+
+
+def _token_cache_key(content: str) -> str:
+    """
+    Build the token count cache key of a text: tokenizer name + xxh3-128 content hash.
+    
+    Args:
+        content: Text whose token count is cached
+        
+    Returns:
+        Cache key
+    """
+    tokenizer_name = os.path.basename(str(getattr(xtokenizer, "name_or_path", "")))
+    return f"{tokenizer_name}:{xxhash.xxh3_128_hexdigest(content.encode('utf-8'))}"
+
+
+def _iter_read_and_count_tokens(file_batches: Iterable[List[str]],
+                                io_executor: Executor,
+                                cpu_executor: Executor,
+                                max_pending: int,
+                                token_cache: Optional[MutableMapping[str, int]] = None) -> Iterator[Tuple[str, Optional[str], int, Optional[str]]]:
+    """
+    Read raw corpus files on an I/O pool and count their tokens on a CPU pool.
+    
+    Reads release the GIL and are run by threads, which keeps many requests in
+    flight on the disk; every read batch is then tokenized in a single
+    `count_tokens_batch` call on a worker process, which only receives the
+    contents and only sends back the token counts.
+    
+    With a token cache, files whose content was counted before are not sent to
+    the process pool at all, and new counts are added to the cache.
+    
+    Args:
+        file_batches: Batches of paths to the raw text/markdown files
+        io_executor: Thread pool used to read the files
+        cpu_executor: Process pool used to count the tokens
+        max_pending: Maximum number of in-flight batches per pool
+        token_cache: Optional mapping from `_token_cache_key` to token count
+        
+    Yields:
+        (file_path, content, tokens, error) tuples in input order, where content
+        is None and error holds the message if a file could not be processed
+    """
+    pending = deque()
+    
+    def pop_results():
+        read_results, cached_counts, future = pending.popleft()
+        try:
+            token_counts = iter(future.result())
+        except Exception as e:
+            for file_path, _, error in read_results:
+                yield file_path, None, 0, error or str(e)
+            return
+        for (file_path, content, error), (cache_key, tokens) in zip(read_results, cached_counts):
+            if error is not None:
+                yield file_path, None, 0, error
+                continue
+            if tokens is None:
+                tokens = next(token_counts)
+                if cache_key is not None:
+                    token_cache[cache_key] = tokens
+            yield file_path, content, tokens, None
+    
+    for read_results in _imap_ordered(io_executor, _read_text_files, file_batches, max_pending):
+        # Look up cached token counts: (cache_key, tokens or None) per file
+        cached_counts = []
+        for _, content, error in read_results:
+            if error is None and token_cache is not None:
+                cache_key = _token_cache_key(content)
+                cached_counts.append((cache_key, token_cache.get(cache_key)))
+            else:
+                cached_counts.append((None, None))
+        
+        contents = [
+            content
+            for (_, content, error), (_, tokens) in zip(read_results, cached_counts)
+            if error is None and tokens is None
+        ]
+        pending.append((read_results, cached_counts, cpu_executor.submit(count_tokens_batch, contents)))
+        if len(pending) >= max_pending:
+            yield from pop_results()
+    while pending:
+        yield from pop_results()
+
+
 @register_framework("pretraining")
 class XFramework_PT(FrameworkABC):
     """
@@ -98,33 +391,8 @@ class XFramework_PT(FrameworkABC):
             Framework starts in INITIALIZED state. Call run() to automatically
             prepare and execute, or call prepare() manually for explicit control.
         """
-        # Set default configuration
-        default_config = {
-            # Text splitter configuration
-            "text_splitter": {
-                "chunk_size": 512,
-                "chunk_overlap": 200,
-                "split_method": "markdown",  # or "semantic"
-                "min_tokens_per_chunk": 20
-            },
-            # LLM cleaner configuration
-            "llm_cleaner": {
-                "enable_token_tracking": True,
-                "reset_tokens_on_start": True
-            },
-            # Storage configuration
-            "storage": {
-                "enable_compression": False,
-                "validate_on_write": True,
-                "cache_type": "jsonl"
-            },
-            # Processing configuration
-            "processing": {
-                "auto_detect_raw_corpus": True,
-                "supported_extensions": [".txt", ".md"],
-                "exclude_patterns": [".bak"]
-            }
-        }
+        # Set default configuration (a private copy, since the framework config can be updated at runtime)
+        default_config = copy.deepcopy(_DEFAULT_PT_CONFIG)
         
         # Merge with provided config
         if config:
@@ -150,12 +418,15 @@ class XFramework_PT(FrameworkABC):
         self.corpus_text_splitter: Optional[XTextSplitter] = None
     
     def _deep_merge_config(self, target: Dict, source: Dict) -> None:
-        """Deep merge configuration dictionaries."""
-        for key, value in source.items():
-            if key in target and isinstance(target[key], dict) and isinstance(value, dict):
-                self._deep_merge_config(target[key], value)
-            else:
-                target[key] = value
+        """Deep merge configuration dictionaries (iteratively, with an explicit stack)."""
+        stack = [(target, source)]
+        while stack:
+            target, source = stack.pop()
+            for key, value in source.items():
+                if key in target and isinstance(target[key], dict) and isinstance(value, dict):
+                    stack.append((target[key], value))
+                else:
+                    target[key] = value
     
     def _on_init(self) -> None:
         """Framework-specific initialization."""
@@ -164,6 +435,13 @@ class XFramework_PT(FrameworkABC):
             f"output_dir='{self.output_dir}', max_workers={self.max_workers}, limit={self.limit}"
         )
         
+        # Resolve the raw corpus file filters once, so traversal only does attribute loads
+        processing_config = self.config["processing"]
+        self._ext_tuple = tuple(processing_config["supported_extensions"])
+        exclude_patterns = processing_config["exclude_patterns"]
+        # One compiled alternation instead of a Python-level scan over the patterns per path
+        self._exclude_re = re.compile("|".join(map(re.escape, exclude_patterns))) if exclude_patterns else None
+        
         # Detect if input is raw corpus
         self._detect_raw_corpus()
         
@@ -177,7 +455,7 @@ class XFramework_PT(FrameworkABC):
     
     def _detect_raw_corpus(self) -> None:
         """Detect if input is a raw corpus directory."""
-        if os.path.isdir(self.input_file):
+        if self.input_stat is not None and stat.S_ISDIR(self.input_stat.st_mode):
             xlogger.info(
                 f"Input path is a directory: '{self.input_file}', "
                 "will be processed as raw text/markdown corpus."
@@ -190,85 +468,154 @@ class XFramework_PT(FrameworkABC):
             )
             self.is_raw_corpus = False
     
-    @safe_execute(fallback_value=None, retry_enabled=False)
+    @staticmethod
+    def _create_tokenize_executor(num_workers: int) -> Executor:
+        """
+        Create the executor that counts raw corpus tokens.
+        
+        A single worker gains nothing from a separate process but would pay for
+        spawning it, loading the tokenizer again and pickling every content, so
+        it tokenizes on a thread of this process instead (the fast tokenizer
+        releases the GIL while encoding).
+        
+        The process pool starts its workers lazily, on the first submit, when the
+        file reader threads are already running. Forking then could copy a lock
+        held by one of them (logging, file I/O, allocator) into a worker that never
+        gets it released, so workers come from a forkserver (spawned where
+        forkserver is not available) instead of a fork of this process.
+        
+        Args:
+            num_workers: Number of tokenization workers
+            
+        Returns:
+            A process pool for multiple workers, otherwise a single thread
+        """
+        if num_workers > 1:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            return ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context(start_method))
+        return ThreadPoolExecutor(max_workers=1)
+    
     def _process_raw_corpus(self) -> Optional[str]:
         """
         Process raw corpus: from raw text/markdown corpus to cleaned JSONL corpus.
         
+        With `processing.raw_output_format` set to "arrow", the corpus is written as
+        an Arrow IPC file instead, which skips JSON escaping of the raw content and
+        can be memory-mapped by the readers of the next step.
+        
         Returns:
-            Path to processed JSONL file or None if processing failed
+            Path to processed JSONL/Arrow file or None if processing failed
         """
         xlogger.info("Processing raw corpus...")
         
         try:
-            # Get supported file extensions and exclude patterns
-            extensions = self.config["processing"]["supported_extensions"]
-            exclude_patterns = self.config["processing"]["exclude_patterns"]
-            
-            # Find all supported files
-            files_list = []
-            for root, _, filenames in os.walk(self.input_file):
-                for file in filenames:
-                    abs_file_path = os.path.join(root, file)
-                    
-                    # Check exclude patterns
-                    if any(pattern in abs_file_path for pattern in exclude_patterns):
-                        continue
-                    
-                    # Check supported extensions
-                    if any(file.endswith(ext) for ext in extensions):
-                        files_list.append(abs_file_path)
-            
-            if not files_list:
-                xlogger.warning(f"No supported files found in '{self.input_file}'")
-                return None
-            
-            xlogger.info(f"Found {len(files_list)} files to process")
+            raw_output_format = self.config["processing"].get("raw_output_format", "jsonl")
+            if raw_output_format not in _RAW_OUTPUT_FORMATS:
+                raise ValueError(
+                    f"Unsupported raw output format: '{raw_output_format}', "
+                    f"expected one of {_RAW_OUTPUT_FORMATS}"
+                )
             
             # Prepare output files
             file_list_path = os.path.join(self.output_dir, "preprocess_raw_corpus_files_list.tsv")
-            jsonl_output_path = os.path.join(self.output_dir, "preprocess_raw_corpus.jsonl")
+            output_path = os.path.join(self.output_dir, f"preprocess_raw_corpus.{raw_output_format}")
+            token_cache_path = os.path.join(self.output_dir, _TOKEN_CACHE_FILE_NAME)
             
-            # Process files
+            # Process files: discover, read (threads) + tokenize (processes) in parallel and write
+            # in discovery order in one pass, so output starts before the directory walk has finished
             total_files = 0
             total_tokens = 0
+            num_workers = max(1, self.max_workers)
+            max_pending = num_workers * _PENDING_BATCHES_PER_WORKER
+            file_batches = _iter_batches(
+                _iter_corpus_files(self.input_file, self._ext_tuple, self._exclude_re),
+                _TOKENIZE_BATCH_SIZE
+            )
             
-            with open(file_list_path, "w", encoding="utf-8") as list_file:
-                with open(jsonl_output_path, "w", encoding="utf-8") as jsonl_file:
-                    for file_path in files_list:
-                        total_files += 1
-                        xlogger.info(f"Processing file {total_files}: '{file_path}'")
-                        
-                        try:
-                            # Read file content
-                            with open(file_path, "r", encoding="utf-8") as infile:
-                                content = infile.read()
-                            
-                            # Count tokens
-                            tokens = count_tokens(content)
-                            total_tokens += tokens
-                            
-                            # Prepare record
-                            record = {
-                                "file_path": file_path,
-                                "raw_content": content,
-                                "raw_content_tokens": tokens,
-                                "processed_at": datetime.now().isoformat()
-                            }
-                            
-                            # Write to JSONL
-                            jsonl_file.write(json.dumps(record, ensure_ascii=False) + "\n")
-                            
-                            # Write to TSV
-                            list_file.write(f"{file_path}\t{tokens}\n")
-                            
-                        except Exception as e:
-                            xlogger.error(f"Failed to process file '{file_path}': {e}")
-                            self.metrics["errors_count"] += 1
-                            continue
+            # Per-file lines are only formatted when DEBUG is enabled; INFO gets one combined line per interval
+            debug_enabled = xlogger.logger.isEnabledFor(logging.DEBUG)
+            errors_count = 0
+            
+            # All records of one preprocessing run share the run's start time
+            processed_at = datetime.now().isoformat()
+            
+            arrow_writer = None
+            arrow_columns = {"file_path": [], "raw_content": [], "raw_content_tokens": [], "processed_at": []}
+            
+            # Large write buffers turn the many small per-file writes into one syscall per MiB
+            with open(file_list_path, "wb", buffering=_WRITE_BUFFER_SIZE) as list_file, \
+                 open(output_path, "wb", buffering=_WRITE_BUFFER_SIZE) as output_file, \
+                 ThreadPoolExecutor(max_workers=min(_MAX_IO_WORKERS, max_pending)) as io_executor, \
+                 self._create_tokenize_executor(num_workers) as cpu_executor, \
+                 (shelve.open(token_cache_path) if self.config["processing"].get("token_cache", False)
+                  else contextlib.nullcontext()) as token_cache:
+                if raw_output_format == "arrow":
+                    import pyarrow as pa
+                    arrow_schema = pa.schema([
+                        ("file_path", pa.string()),
+                        ("raw_content", pa.large_string()),
+                        ("raw_content_tokens", pa.int64()),
+                        ("processed_at", pa.string())
+                    ])
+                    arrow_writer = pa.ipc.new_file(output_file, arrow_schema)
+                
+                for file_path, content, tokens, error in _iter_read_and_count_tokens(
+                    file_batches, io_executor, cpu_executor, max_pending, token_cache
+                ):
+                    total_files += 1
+                    if debug_enabled:
+                        xlogger.debug(f"Processing file {total_files}: '{file_path}'")
+                    
+                    if error is not None:
+                        xlogger.error(f"Failed to process file '{file_path}': {error}")
+                        errors_count += 1
+                    else:
+                        total_tokens += tokens
+                    
+                    if total_files % _PROGRESS_LOG_INTERVAL == 0:
+                        xlogger.info(
+                            f"Processed {total_files} files ({errors_count} failed), "
+                            f"{total_tokens} tokens so far"
+                        )
+                    
+                    if error is not None:
+                        continue
+                    
+                    # Prepare record
+                    record = {
+                        "file_path": file_path,
+                        "raw_content": content,
+                        "raw_content_tokens": tokens,
+                        "processed_at": processed_at
+                    }
+                    
+                    # Write the record and its TSV line (orjson emits UTF-8 without ASCII escaping)
+                    if arrow_writer is not None:
+                        for key, value in record.items():
+                            arrow_columns[key].append(value)
+                        if len(arrow_columns["file_path"]) >= _ARROW_BATCH_ROWS:
+                            arrow_writer.write_batch(pa.record_batch(arrow_columns, schema=arrow_schema))
+                            for column in arrow_columns.values():
+                                column.clear()
+                    else:
+                        output_file.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+                    list_file.write(f"{file_path}\t{tokens}\n".encode("utf-8"))
+                
+                # Write the remaining Arrow rows
+                if arrow_writer is not None:
+                    if arrow_columns["file_path"]:
+                        arrow_writer.write_batch(pa.record_batch(arrow_columns, schema=arrow_schema))
+                    arrow_writer.close()
+            
+            if total_files == 0:
+                xlogger.warning(f"No supported files found in '{self.input_file}'")
+                os.remove(file_list_path)
+                os.remove(output_path)
+                return None
             
             # Update metrics
             self.metrics["files_processed"] = total_files
+            self.metrics["errors_count"] += errors_count
             self.metrics["tokens_processed"] = total_tokens
             
             xlogger.success(
@@ -276,7 +623,7 @@ class XFramework_PT(FrameworkABC):
                 f"{total_tokens} tokens processed"
             )
             
-            return jsonl_output_path
+            return output_path
             
         except Exception as e:
             error_handler.handle_error(
@@ -335,7 +682,7 @@ class XFramework_PT(FrameworkABC):
             if not self.input_file or not os.path.exists(self.input_file):
                 raise FileNotFoundError(f"Input file not found: {self.input_file}")
             
-            if not self.input_file.endswith(".jsonl"):
+            if not (self.input_file.endswith(".jsonl") or self.input_file == self.preprocessed_file):
                 raise ValueError("Input file must be a JSONL file for processing")
             
             # Reset token usage if configured
@@ -5,13 +5,61 @@ Micro-ops: remove emails
 @date:   2025-08-13
 """
 import re
-from typing import Dict, Any, Optional
+import functools
+from typing import Dict, Any, List, Optional, Sequence
 
 from xpertcorpus.utils import xlogger
-from xpertcorpus.utils.xerror_handler import XErrorHandler, XRetryMechanism
+from xpertcorpus.utils.xutils import collapse_whitespace_batch
+from xpertcorpus.utils.xerror_handler import XErrorHandler
 from xpertcorpus.modules.others.xoperator import OperatorABC, register_operator
 
 
+# Maximum number of per-domain whitelist decisions cached by each operator
+_DOMAIN_DECISION_CACHE_SIZE = 4096
+
+# Fallback mask for strings that are not of the form local@domain
+_FALLBACK_MASK = '***@***.***'
+
+
+def _mask_local_part(local: str) -> str:
+    """Mask the local part of an email, keeping its first and last characters."""
+    if len(local) <= 2:
+        return '*' * len(local)
+    return local[0] + '*' * (len(local) - 2) + local[-1]
+
+
+def _mask_email_keep_domain(email: str) -> str:
+    """Mask the local part of an email address and keep its domain."""
+    at = email.find('@')
+    if at == -1:
+        return _FALLBACK_MASK
+    return f"{_mask_local_part(email[:at])}@{email[at + 1:]}"
+
+
+def _mask_email_hide_domain(email: str) -> str:
+    """Mask the local part and the domain name of an email address, keeping the TLD."""
+    at = email.find('@')
+    if at == -1:
+        return _FALLBACK_MASK
+    domain = email[at + 1:]
+    dot = domain.find('.')
+    masked_domain = '*' * dot + domain[dot:] if dot != -1 else '*' * len(domain)
+    return f"{_mask_local_part(email[:at])}@{masked_domain}"
+
+
+def _make_mask_fn(preserve_domains: bool):
+    """
+    Select the email masking function for the given configuration.
+    
+    Args:
+        preserve_domains: Keep domain parts when masking
+        
+    Returns:
+        Function mapping an email address to its masked form
+    """
+    return _mask_email_keep_domain if preserve_domains else _mask_email_hide_domain
+
+
 @register_operator("remove_emails")
 class RemoveEmailsMicroops(OperatorABC):
     """
@@ -36,6 +84,8 @@ class RemoveEmailsMicroops(OperatorABC):
                 - preserve_domains: Keep domain parts when masking (default: False)
                 - whitelist_domains: List of domains to preserve (default: [])
                 - case_sensitive: Case sensitive domain matching (default: False)
+                - strip_on_passthrough: Strip texts without emails; other whitespace is
+                  only normalized where an email was found (default: False)
         """
         super().__init__(config)
         self.error_handler = XErrorHandler()
@@ -46,7 +96,8 @@ class RemoveEmailsMicroops(OperatorABC):
             'mask_instead_remove': False,
             'preserve_domains': False,
             'whitelist_domains': [],
-            'case_sensitive': False
+            'case_sensitive': False,
+            'strip_on_passthrough': False
         }
         
         # Merge with provided config
@@ -57,6 +108,12 @@ class RemoveEmailsMicroops(OperatorABC):
         # Compile regex patterns for better performance
         self._compile_patterns()
         
+        # Masking function chosen once per configuration, so masking an email does no config lookups
+        self._mask_email = _make_mask_fn(self.config['preserve_domains'])
+        
+        # Whitelisted domains, normalized once instead of on every matched email
+        self._build_domain_whitelist()
+        
         # Statistics
         self.stats = {
             'emails_removed': 0,
@@ -66,6 +123,21 @@ class RemoveEmailsMicroops(OperatorABC):
         
         xlogger.info(f"Initialized {self.__class__.__name__} with config: {self.config}")
     
+    def _on_configure(self) -> None:
+        """Rebuild the state derived from the configuration after `configure()`."""
+        self._mask_email = _make_mask_fn(self.config['preserve_domains'])
+        self._build_domain_whitelist()
+    
+    def _build_domain_whitelist(self) -> None:
+        """Normalize the whitelisted domains and start a new per-domain decision cache."""
+        self._whitelist = frozenset(
+            d if self.config['case_sensitive'] else d.lower()
+            for d in self.config['whitelist_domains']
+        )
+        self._is_domain_removable = functools.lru_cache(maxsize=_DOMAIN_DECISION_CACHE_SIZE)(
+            self._check_domain_whitelist
+        )
+    
     def _compile_patterns(self):
         """Compile regex patterns for email detection."""
         # Comprehensive email pattern
@@ -106,12 +178,7 @@ class RemoveEmailsMicroops(OperatorABC):
         if not input_string or not isinstance(input_string, str):
             return input_string or ""
         
-        return self.error_handler.execute_with_retry(
-            func=self._remove_emails,
-            args=(input_string,),
-            max_retries=2,
-            operation_name="Email removal"
-        )
+        return self._remove_emails(input_string)
     
     def _remove_emails(self, text: str) -> str:
         """
@@ -126,26 +193,19 @@ class RemoveEmailsMicroops(OperatorABC):
         try:
             original_text = text
             
-            def replace_email(match):
-                email = match.group(0)
-                
-                if self._should_remove_email(email):
-                    if self.config['mask_instead_remove']:
-                        masked = self._mask_email(email)
-                        self.stats['emails_masked'] += 1
-                        return masked
-                    else:
-                        self.stats['emails_removed'] += 1
-                        return self.config['replacement_text']
-                
-                return email
-            
-            # Apply email replacement
-            text = self.email_pattern.sub(replace_email, text)
+            # Apply email replacement; text without '@' cannot contain an email,
+            # so the regex pass is skipped after a single C-level scan
+            num_emails = 0
+            if '@' in text:
+                text, num_emails = self.email_pattern.subn(self._replace_email, text)
+            
+            # Most texts contain no email: pass them through without another scan
+            if not num_emails:
+                return text.strip() if self.config['strip_on_passthrough'] else text
             
             # Clean up extra whitespace
-            text = self.whitespace_pattern.sub(' ', text)
-            text = text.strip()
+            # (same result as whitespace_pattern.sub(' ', text).strip(), without the regex engine)
+            text = ' '.join(text.split())
             
             # Log statistics periodically
             total_processed = self.stats['emails_removed'] + self.stats['emails_masked']
@@ -159,6 +219,65 @@ class RemoveEmailsMicroops(OperatorABC):
             xlogger.warning(f"Email removal failed for text sample: {text[:100]}... Error: {e}")
             return original_text
     
+    def _replace_email(self, match: re.Match) -> str:
+        """
+        Replacement for one matched email: removed, masked or kept as configured.
+        
+        Args:
+            match: Match of the email pattern
+            
+        Returns:
+            Replacement text for the match
+        """
+        email = match.group(0)
+        
+        if self._should_remove_email(email):
+            if self.config['mask_instead_remove']:
+                masked = self._mask_email(email)
+                self.stats['emails_masked'] += 1
+                return masked
+            else:
+                self.stats['emails_removed'] += 1
+                return self.config['replacement_text']
+        
+        return email
+    
+    def run_batch(self, texts: Sequence[Optional[str]]) -> List[str]:
+        """
+        Remove or mask emails in a batch of texts.
+        
+        Emails are replaced text by text (masking and whitelists need Python), and
+        only in texts containing '@'; the whitespace cleanup then runs once over the
+        texts where an email was found, inside Arrow's compute kernels when pyarrow
+        is installed.
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            Cleaned texts, in input order (empty or None entries become '', as in `run`)
+        """
+        strip_on_passthrough = self.config['strip_on_passthrough']
+        results = []
+        changed = []  # Indices of texts in which an email was found
+        for text in texts:
+            num_emails = 0
+            if text and '@' in text:
+                text, num_emails = self.email_pattern.subn(self._replace_email, text)
+            if num_emails:
+                changed.append(len(results))
+            elif not text:
+                text = ""
+            elif strip_on_passthrough:
+                text = text.strip()
+            results.append(text)
+        
+        if changed:
+            collapsed = collapse_whitespace_batch([results[i] for i in changed])
+            for i, text in zip(changed, collapsed):
+                results[i] = text
+        return results
+    
     def _should_remove_email(self, email: str) -> bool:
         """
         Determine if an email should be removed based on configuration.
@@ -170,63 +289,47 @@ class RemoveEmailsMicroops(OperatorABC):
             True if email should be removed, False otherwise
         """
         try:
+            # Default (no whitelist): remove emails
+            if not self._whitelist:
+                return True
+            
             # Extract domain
-            domain = email.split('@')[-1]
+            domain = email[email.rfind('@') + 1:]
             
             # Check case sensitivity
             check_domain = domain if self.config['case_sensitive'] else domain.lower()
             
-            # Check whitelist
-            whitelist = [d if self.config['case_sensitive'] else d.lower() 
-                        for d in self.config['whitelist_domains']]
-            
-            if whitelist:
-                # Only remove if not in whitelist
-                return not any(check_domain == wd or check_domain.endswith('.' + wd) for wd in whitelist)
-            
-            # Default: remove emails
-            return True
+            # Check whitelist (decisions are cached per domain)
+            return self._is_domain_removable(check_domain)
             
         except Exception:
             # On error, default to removing
             return True
     
-    def _mask_email(self, email: str) -> str:
+    def _check_domain_whitelist(self, check_domain: str) -> bool:
         """
-        Mask an email address preserving some structure.
+        Check a normalized domain against the whitelist.
+        
+        Wrapped per instance with an LRU cache as `_is_domain_removable`, since
+        most emails of a corpus share a few domains.
         
         Args:
-            email: Email address to mask
+            check_domain: Domain of an email, lowercased unless case sensitive
             
         Returns:
-            Masked email address
+            True if emails of the domain should be removed, False otherwise
         """
-        try:
-            local, domain = email.split('@', 1)
-            
-            # Mask local part
-            if len(local) <= 2:
-                masked_local = '*' * len(local)
-            else:
-                masked_local = local[0] + '*' * (len(local) - 2) + local[-1]
-            
-            # Mask domain if not preserving
-            if self.config['preserve_domains']:
-                masked_domain = domain
-            else:
-                domain_parts = domain.split('.')
-                if len(domain_parts) >= 2:
-                    # Mask domain name but keep TLD
-                    masked_name = '*' * len(domain_parts[0])
-                    masked_domain = masked_name + '.' + '.'.join(domain_parts[1:])
-                else:
-                    masked_domain = '*' * len(domain)
-            
-            return f"{masked_local}@{masked_domain}"
-            
-        except Exception:
-            # Fallback to simple masking
-            return '***@***.***'
+        # Only remove if neither the domain nor one of its parent domains is
+        # whitelisted: one set lookup per label instead of a scan of the whitelist
+        whitelist = self._whitelist
+        if check_domain in whitelist:
+            return False
+        dot = check_domain.find('.')
+        while dot != -1:
+            if check_domain[dot + 1:] in whitelist:
+                return False
+            dot = check_domain.find('.', dot + 1)
+        return True
     
     def get_stats(self) -> Dict[str, Any]:
         """Get processing statistics."""
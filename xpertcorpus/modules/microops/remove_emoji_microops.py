@@ -5,13 +5,207 @@ Micro-ops: remove emoji
 @date:   2025-08-12
 """
 import re
+import sys
+import functools
+import itertools
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Pattern, Sequence, Tuple
 from xpertcorpus.utils import xlogger
-from xpertcorpus.utils.xerror_handler import XErrorHandler, XRetryMechanism
+from xpertcorpus.utils.xutils import collapse_whitespace_batch, _RE2_WHITESPACE_CLASS
+from xpertcorpus.utils.xerror_handler import XErrorHandler
 from xpertcorpus.modules.others.xoperator import OperatorABC, register_operator
 
 
+# Codepoint ranges of the main emoji pattern (Unicode 15.0 support)
+_EMOJI_RANGES = [
+    # Basic emoji blocks
+    (0x1F600, 0x1F64F),  # Emoticons
+    (0x1F300, 0x1F5FF),  # Miscellaneous Symbols and Pictographs
+    (0x1F680, 0x1F6FF),  # Transport and Map Symbols
+    (0x1F1E0, 0x1F1FF),  # Regional Indicator Symbols (flags)
+    
+    # Extended emoji blocks
+    (0x1F700, 0x1F77F),  # Alchemical Symbols
+    (0x1F780, 0x1F7FF),  # Geometric Shapes Extended
+    (0x1F800, 0x1F8FF),  # Supplemental Arrows-C
+    (0x1F900, 0x1F9FF),  # Supplemental Symbols and Pictographs
+    (0x1FA00, 0x1FA6F),  # Chess Symbols
+    (0x1FA70, 0x1FAFF),  # Symbols and Pictographs Extended-A
+    
+    # Additional Unicode blocks with emoji
+    (0x2600, 0x26FF),  # Miscellaneous Symbols
+    (0x2700, 0x27BF),  # Dingbats
+    (0x1F000, 0x1F02F),  # Mahjong Tiles
+    (0x1F0A0, 0x1F0FF),  # Playing Cards
+    
+    # Emoji scattered over other blocks (a single 0x24C2-0x1F251 range would
+    # also cover all CJK text)
+    (0x24C2, 0x24C2),  # Circled Latin capital letter M
+    (0x25AA, 0x25FE),  # Geometric Shapes with emoji presentation
+    (0x2934, 0x2935),  # Curved arrows
+    (0x2B05, 0x2B55),  # Arrows, squares and circles with emoji presentation
+    (0x3030, 0x3030),  # Wavy dash
+    (0x303D, 0x303D),  # Part alternation mark
+    (0x3297, 0x3297),  # Circled ideograph congratulation
+    (0x3299, 0x3299),  # Circled ideograph secret
+    
+    # Enclosed characters that might be emojis
+    (0x1F100, 0x1F1FF),  # Enclosed Alphanumeric Supplement
+    (0x1F200, 0x1F251),  # Enclosed Ideographic Supplement
+]
+
+# Codepoint ranges deleted by the translate path: the emoji characters and every
+# variation selector (skin tone modifiers already lie within the pictograph block)
+_EMOJI_CHAR_RANGES = _EMOJI_RANGES + [
+    (0xFE00, 0xFE0F),  # Variation selectors
+]
+
+# Character class of the codepoints deleted by the translate path
+_EMOJI_CHAR_CLASS = '[' + ''.join(f'\\U{lo:08X}-\\U{hi:08X}' for lo, hi in _EMOJI_CHAR_RANGES) + ']'
+
+# Keycap sequence, removed before the emoji characters so that deleting them cannot
+# join a digit and a stray U+20E3 into a new keycap
+_KEYCAP_PATTERN = re.compile(r'[0-9#*]\uFE0F?\u20E3')
+
+# Optional/repeat quantifiers of the emoji sequence groups: possessive where the
+# `re` module supports it (Python 3.11+), so matching keeps no backtracking state
+# (a sequence never has to give modifiers back, so the matches are the same)
+_OPT, _STAR = ('?+', '*+') if sys.version_info >= (3, 11) else ('?', '*')
+
+
+def _to_re2_pattern(pattern: str) -> str:
+    """
+    Rewrite the `\\UXXXXXXXX` / `\\uXXXX` escapes of a Python pattern as RE2 `\\x{...}` escapes,
+    its possessive group quantifiers as plain ones (RE2 never backtracks), and its
+    `\\s` as the Unicode whitespace class of Python (RE2's `\\s` is ASCII-only).
+    
+    Args:
+        pattern: Python regex pattern
+        
+    Returns:
+        The same pattern in RE2 syntax, as used by Arrow's regex kernels
+    """
+    pattern = pattern.replace(')?+', ')?').replace(')*+', ')*')
+    pattern = re.sub(
+        r'\\\\|\\s',  # Escaped backslashes are matched too, so a literal '\' before 's' stays
+        lambda match: _RE2_WHITESPACE_CLASS if match.group() == '\\s' else match.group(),
+        pattern
+    )
+    return re.sub(
+        r'\\U([0-9A-Fa-f]{8})|\\u([0-9A-Fa-f]{4})',
+        lambda match: '\\x{' + (match.group(1) or match.group(2)) + '}',
+        pattern
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _build_emoji_translate_table() -> Dict[int, None]:
+    """
+    Build the `str.translate` table deleting every emoji character on its own.
+    
+    The result matches the regex path without ZWJ handling except for variation
+    selectors: the table deletes every U+FE00-U+FE0F, while the regex only removes
+    one right after an emoji or inside a keycap. Selectors elsewhere, such as a text
+    presentation selector after '©' or a standardized variant of a CJK ideograph,
+    are dropped here and kept by the regex.
+    
+    Returns:
+        Mapping of each emoji codepoint to None
+    """
+    return dict.fromkeys(itertools.chain.from_iterable(range(lo, hi + 1) for lo, hi in _EMOJI_CHAR_RANGES))
+
+
+@functools.lru_cache(maxsize=16)
+def _build_emoji_patterns(remove_skin_tones: bool,
+                          remove_zwj_sequences: bool,
+                          preserve_text_emoji: bool) -> Tuple[Pattern[str], Tuple[Pattern[str], ...], Pattern[str], Optional[Pattern[str]]]:
+    """
+    Compile the emoji detection patterns for one combination of flags.
+    
+    Cached at module level, so operator instances with the same flags share the
+    compiled patterns instead of compiling the large Unicode classes again.
+    
+    Args:
+        remove_skin_tones: Whether to remove skin tone modifiers
+        remove_zwj_sequences: Whether to remove ZWJ sequences
+        preserve_text_emoji: Whether to preserve text-based emoticons
+        
+    Returns:
+        Tuple of (main emoji pattern, edge case patterns, main and edge case patterns
+        combined, text emoticon pattern or None)
+    """
+    
+    # Main emoji pattern with Unicode 15.0 support
+    emoji_ranges = [f'\\U{lo:08X}-\\U{hi:08X}' for lo, hi in _EMOJI_RANGES]
+    
+    # Skin tone modifiers
+    skin_tone_pattern = r'[\U0001F3FB-\U0001F3FF]'
+    
+    # Zero Width Joiner (ZWJ) sequences pattern
+    zwj_pattern = r'\u200D'
+    
+    # Variation selectors (emoji vs text presentation)
+    variation_selectors = r'[\uFE00-\uFE0F]'
+    
+    # Combine all emoji ranges
+    emoji_base_pattern = f'[{"".join(emoji_ranges)}]'
+    
+    # Build comprehensive pattern
+    if remove_skin_tones and remove_zwj_sequences:
+        # Pattern that matches emoji with optional skin tones, ZWJ sequences, and variation selectors
+        emoji_pattern = (
+            f'(?:{emoji_base_pattern}'
+            f'(?:{skin_tone_pattern}){_OPT}'
+            f'(?:{variation_selectors}){_OPT}'
+            f'(?:{zwj_pattern}{emoji_base_pattern}(?:{skin_tone_pattern}){_OPT}(?:{variation_selectors}){_OPT}){_STAR}'
+            f')'
+        )
+    elif remove_skin_tones:
+        # Pattern without ZWJ but with skin tones
+        emoji_pattern = f'{emoji_base_pattern}(?:{skin_tone_pattern}){_OPT}(?:{variation_selectors}){_OPT}'
+    elif remove_zwj_sequences:
+        # Pattern with ZWJ but without skin tone consideration
+        emoji_pattern = f'(?:{emoji_base_pattern}(?:{variation_selectors}){_OPT}(?:{zwj_pattern}{emoji_base_pattern}(?:{variation_selectors}){_OPT}){_STAR})'
+    else:
+        # Basic pattern without special handling
+        emoji_pattern = f'{emoji_base_pattern}(?:{variation_selectors}){_OPT}'
+    
+    # Compile the main emoji pattern
+    compiled_emoji_pattern = re.compile(emoji_pattern, flags=re.UNICODE)
+    
+    # Additional patterns for edge cases
+    edge_case_patterns = [
+        # Keycap sequences (like 1️⃣, 2️⃣, etc.)
+        r'[0-9#*]\uFE0F?\u20E3',
+        # Tag sequences for subdivision flags
+        r'\U0001F3F4[\U000E0060-\U000E007F]+\U000E007F',
+        # Fitzpatrick skin tone modifiers standalone
+        r'[\U0001F3FB-\U0001F3FF]',
+    ]
+    compiled_edge_case_patterns = tuple(re.compile(pattern, re.UNICODE) for pattern in edge_case_patterns)
+    
+    # Main pattern and edge cases fused into one alternation, so the text is scanned once
+    combined_pattern = re.compile(
+        '|'.join([emoji_pattern] + edge_case_patterns),
+        flags=re.UNICODE
+    )
+    
+    # Text-based emoticons pattern (if preservation is disabled)
+    if not preserve_text_emoji:
+        # Common text emoticons pattern
+        text_emoticon_pattern = re.compile(
+            r'(?:[:;=8][\'\-]?[)\](}>|DdPp\\\/\[]|'  # Basic emoticons
+            r'[)\]}>|DdPp\\\/\[]\s*[:;=8]|'         # Reverse emoticons
+            r'<3|</3|<\\3|\\o/|o_O|O_o|'           # Special cases
+            r'\^\^|\^_\^|>_<|ಠ_ಠ|¯\\_(ツ)_/¯)',     # Unicode emoticons
+            re.UNICODE
+        )
+    else:
+        text_emoticon_pattern = None
+    
+    return compiled_emoji_pattern, compiled_edge_case_patterns, combined_pattern, text_emoticon_pattern
+
+
 @register_operator("remove_emoji")
 class RemoveEmojiMicroops(OperatorABC):
     """
@@ -39,7 +233,6 @@ class RemoveEmojiMicroops(OperatorABC):
         """
         super().__init__(config)
         self.error_handler = XErrorHandler()
-        self.retry_mechanism = XRetryMechanism(max_retries=2, base_delay=0.1)
         
         # Configuration parameters
         self.replacement_text = self.config.get('replacement_text', '')
@@ -54,91 +247,23 @@ class RemoveEmojiMicroops(OperatorABC):
 
     def _compile_emoji_patterns(self) -> None:
         """Compile comprehensive emoji detection patterns for better performance."""
+        (
+            self.emoji_pattern,
+            self.edge_case_patterns,
+            self.combined_pattern,
+            self.text_emoticon_pattern,
+        ) = _build_emoji_patterns(
+            bool(self.remove_skin_tones),
+            bool(self.remove_zwj_sequences),
+            bool(self.preserve_text_emoji)
+        )
         
-        # Main emoji pattern with Unicode 15.0 support
-        emoji_ranges = [
-            # Basic emoji blocks
-            r'\U0001F600-\U0001F64F',  # Emoticons
-            r'\U0001F300-\U0001F5FF',  # Miscellaneous Symbols and Pictographs
-            r'\U0001F680-\U0001F6FF',  # Transport and Map Symbols
-            r'\U0001F1E0-\U0001F1FF',  # Regional Indicator Symbols (flags)
-            
-            # Extended emoji blocks
-            r'\U0001F700-\U0001F77F',  # Alchemical Symbols
-            r'\U0001F780-\U0001F7FF',  # Geometric Shapes Extended
-            r'\U0001F800-\U0001F8FF',  # Supplemental Arrows-C
-            r'\U0001F900-\U0001F9FF',  # Supplemental Symbols and Pictographs
-            r'\U0001FA00-\U0001FA6F',  # Chess Symbols
-            r'\U0001FA70-\U0001FAFF',  # Symbols and Pictographs Extended-A
-            
-            # Additional Unicode blocks with emoji
-            r'\U00002600-\U000026FF',  # Miscellaneous Symbols
-            r'\U00002700-\U000027BF',  # Dingbats
-            r'\U0001F000-\U0001F02F',  # Mahjong Tiles
-            r'\U0001F0A0-\U0001F0FF',  # Playing Cards
-            
-            # Enclosed characters that might be emojis
-            r'\U000024C2-\U0001F251',  # Enclosed characters
-            r'\U0001F100-\U0001F1FF',  # Enclosed Alphanumeric Supplement
-        ]
-        
-        # Skin tone modifiers
-        skin_tone_pattern = r'[\U0001F3FB-\U0001F3FF]'
-        
-        # Zero Width Joiner (ZWJ) sequences pattern
-        zwj_pattern = r'\u200D'
-        
-        # Variation selectors (emoji vs text presentation)
-        variation_selectors = r'[\uFE00-\uFE0F]'
-        
-        # Combine all emoji ranges
-        emoji_base_pattern = f'[{"".join(emoji_ranges)}]'
-        
-        # Build comprehensive pattern
-        if self.remove_skin_tones and self.remove_zwj_sequences:
-            # Pattern that matches emoji with optional skin tones, ZWJ sequences, and variation selectors
-            emoji_pattern = (
-                f'(?:{emoji_base_pattern}'
-                f'(?:{skin_tone_pattern})?'
-                f'(?:{variation_selectors})?'
-                f'(?:{zwj_pattern}{emoji_base_pattern}(?:{skin_tone_pattern})?(?:{variation_selectors})?)*'
-                f')'
-            )
-        elif self.remove_skin_tones:
-            # Pattern without ZWJ but with skin tones
-            emoji_pattern = f'{emoji_base_pattern}(?:{skin_tone_pattern})?(?:{variation_selectors})?'
-        elif self.remove_zwj_sequences:
-            # Pattern with ZWJ but without skin tone consideration
-            emoji_pattern = f'(?:{emoji_base_pattern}(?:{variation_selectors})?(?:{zwj_pattern}{emoji_base_pattern}(?:{variation_selectors})?)*)'
-        else:
-            # Basic pattern without special handling
-            emoji_pattern = f'{emoji_base_pattern}(?:{variation_selectors})?'
-        
-        # Compile the main emoji pattern
-        self.emoji_pattern = re.compile(emoji_pattern, flags=re.UNICODE)
-        
-        # Additional patterns for edge cases
-        self.edge_case_patterns = [
-            # Keycap sequences (like 1️⃣, 2️⃣, etc.)
-            re.compile(r'[0-9#*]\uFE0F?\u20E3', re.UNICODE),
-            # Tag sequences for subdivision flags
-            re.compile(r'\U0001F3F4[\U000E0060-\U000E007F]+\U000E007F', re.UNICODE),
-            # Fitzpatrick skin tone modifiers standalone
-            re.compile(r'[\U0001F3FB-\U0001F3FF]', re.UNICODE),
-        ]
-        
-        # Text-based emoticons pattern (if preservation is disabled)
-        if not self.preserve_text_emoji:
-            # Common text emoticons pattern
-            self.text_emoticon_pattern = re.compile(
-                r'(?:[:;=8][\'\-]?[)\](}>|DdPp\\\/\[]|'  # Basic emoticons
-                r'[)\]}>|DdPp\\\/\[]\s*[:;=8]|'         # Reverse emoticons
-                r'<3|</3|<\\3|\\o/|o_O|O_o|'           # Special cases
-                r'\^\^|\^_\^|>_<|ಠ_ಠ|¯\\_(ツ)_/¯)',     # Unicode emoticons
-                re.UNICODE
-            )
+        # Without ZWJ handling the pattern has no cross-character context, so deleting
+        # the emoji characters one by one is a plain `str.translate` (no regex engine)
+        if not self.remove_zwj_sequences and self.replacement_text == '':
+            self._emoji_translate_table = _build_emoji_translate_table()
         else:
-            self.text_emoticon_pattern = None
+            self._emoji_translate_table = None
 
     @staticmethod
     def get_desc(lang: str = "zh") -> str:
@@ -159,24 +284,68 @@ class RemoveEmojiMicroops(OperatorABC):
         Returns:
             Text with emojis removed
         """
-        # Remove main emoji patterns
-        text = self.emoji_pattern.sub(self.replacement_text, text)
-        
-        # Remove edge case patterns
-        for pattern in self.edge_case_patterns:
-            text = pattern.sub(self.replacement_text, text)
+        # Every emoji pattern needs a non-ASCII character (keycaps end with U+20E3), so
+        # ASCII text skips the emoji pass entirely (the check is O(1) for ASCII strings)
+        if not text.isascii():
+            if self._emoji_translate_table is not None:
+                # Keycaps span characters the table does not delete, so they go first;
+                # the emoji characters are then deleted in one C loop. Tag characters
+                # (U+E0020-E007F) are not in the table either and stay, as on the regex
+                # path, where the main pattern takes the black flag before the tag
+                # sequence alternative can match
+                if '\u20E3' in text:
+                    text = _KEYCAP_PATTERN.sub('', text)
+                text = text.translate(self._emoji_translate_table)
+            else:
+                # Remove main emoji and edge case patterns in a single pass
+                text = self.combined_pattern.sub(self.replacement_text, text)
         
         # Remove text emoticons if configured
         if self.text_emoticon_pattern:
             text = self.text_emoticon_pattern.sub(self.replacement_text, text)
         
         # Clean up multiple consecutive spaces that might result from removal
+        # (same result as re.sub(r'\s+', ' ', text).strip(), without the regex engine)
         if self.replacement_text == '':
-            text = re.sub(r'\s+', ' ', text)
-            text = text.strip()
+            text = ' '.join(text.split())
         
         return text
     
+    def run_batch(self, texts: Sequence[Optional[str]]) -> List[Optional[str]]:
+        """
+        Remove emojis from a batch of texts.
+        
+        The emoji patterns run inside Arrow's compute kernels (RE2) over the whole
+        batch, so the per-text Python dispatch of `run` is paid once per batch.
+        Falls back to processing text by text when pyarrow is not installed.
+        
+        Args:
+            texts: Input texts (None entries are kept as None)
+            
+        Returns:
+            Texts with emojis removed, in input order
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+        except ImportError:
+            return [self._remove_emojis(text) if text else text for text in texts]
+        
+        array = pa.array(texts, type=pa.large_string())
+        replacement = self.replacement_text.replace('\\', '\\\\')  # RE2 rewrite strings treat '\\' as special
+        if self._emoji_translate_table is not None:
+            # Same steps as the translate path: keycaps, then every emoji character
+            array = pc.replace_substring_regex(array, pattern=_to_re2_pattern(_KEYCAP_PATTERN.pattern), replacement='')
+            array = pc.replace_substring_regex(array, pattern=_to_re2_pattern(_EMOJI_CHAR_CLASS), replacement='')
+        else:
+            array = pc.replace_substring_regex(array, pattern=_to_re2_pattern(self.combined_pattern.pattern), replacement=replacement)
+        if self.text_emoticon_pattern:
+            array = pc.replace_substring_regex(array, pattern=_to_re2_pattern(self.text_emoticon_pattern.pattern), replacement=replacement)
+        
+        if self.replacement_text == '':
+            return collapse_whitespace_batch(array)
+        return array.to_pylist()
+    
     def run(self, input_string: str) -> str:
         """
         Enhanced emoji removal with error handling and performance optimization.
@@ -190,12 +359,8 @@ class RemoveEmojiMicroops(OperatorABC):
         if not input_string:
             return input_string
 
-        def _process_text() -> str:
-            return self._remove_emojis(input_string)
-
         try:
-            # Use retry mechanism for processing
-            result = self.retry_mechanism.execute(_process_text)
+            result = self._remove_emojis(input_string)
             
             # Log processing statistics
             original_length = len(input_string)
@@ -211,8 +376,11 @@ class RemoveEmojiMicroops(OperatorABC):
         except Exception as e:
             error_info = self.error_handler.handle_error(
                 e,
-                context=f"Processing text with length {len(input_string)}",
-                operation="remove_emoji"
+                context={
+                    "operation": "remove_emoji",
+                    "text_length": len(input_string)
+                },
+                should_raise=False
             )
             xlogger.error(f"Error in emoji removal: {error_info}")
             return input_string  # Return original on error
\ No newline at end of file
@@ -8,7 +8,7 @@ import re
 from typing import Dict, Any, Optional
 
 from xpertcorpus.utils import xlogger
-from xpertcorpus.utils.xerror_handler import XErrorHandler, XRetryMechanism
+from xpertcorpus.utils.xerror_handler import XErrorHandler
 from xpertcorpus.modules.others.xoperator import OperatorABC, register_operator
 
 
@@ -38,7 +38,6 @@ class RemoveEmoticonsMicroops(OperatorABC):
         """
         super().__init__(config)
         self.error_handler = XErrorHandler()
-        self.retry_mechanism = XRetryMechanism(max_retries=2, base_delay=0.1)
         
         # Configuration parameters
         self.replacement_text = self.config.get('replacement_text', '')
@@ -160,12 +159,8 @@ class RemoveEmoticonsMicroops(OperatorABC):
         if not input_string:
             return input_string
 
-        def _process_text() -> str:
-            return self._remove_emoticons(input_string)
-
         try:
-            # Use retry mechanism for processing
-            result = self.retry_mechanism.execute(_process_text)
+            result = self._remove_emoticons(input_string)
             
             # Log processing statistics
             original_length = len(input_string)
@@ -181,8 +176,11 @@ class RemoveEmoticonsMicroops(OperatorABC):
         except Exception as e:
             error_info = self.error_handler.handle_error(
                 e,
-                context=f"Processing text with length {len(input_string)}",
-                operation="remove_emoticons"
+                context={
+                    "operation": "remove_emoticons",
+                    "text_length": len(input_string)
+                },
+                should_raise=False
             )
             xlogger.error(f"Error removing emoticons: {error_info}")
             return input_string  # Return original on error
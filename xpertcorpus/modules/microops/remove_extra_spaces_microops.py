@@ -5,13 +5,98 @@ Micro-ops: remove extra spaces
 @date:   2025-08-12
 """
 import re
-from typing import Dict, Any, Optional, List, Tuple
+import xxhash
+import functools
+import threading
+
+from collections import OrderedDict
+from typing import Dict, Any, Callable, FrozenSet, Optional, List, Pattern, Tuple
 
 from xpertcorpus.utils import xlogger
-from xpertcorpus.utils.xerror_handler import XErrorHandler, XRetryMechanism
+from xpertcorpus.utils.xerror_handler import XErrorHandler
 from xpertcorpus.modules.others.xoperator import OperatorABC, register_operator
 
 
+# Placeholder masking a preserved code block, and the pattern finding placeholders again
+_PLACEHOLDER_PATTERN = "___CODE_BLOCK_PLACEHOLDER_{}_END___"
+_PLACEHOLDER_RE = re.compile(r'___CODE_BLOCK_PLACEHOLDER_(\d+)_END___')
+
+# Maximum number of code detection decisions cached by each operator
+_CODE_DECISION_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=1)
+def _build_patterns() -> Tuple[Tuple[Pattern[str], ...], Pattern[str], Dict[str, Pattern[str]], FrozenSet[str], Callable[..., Optional[re.Match]]]:
+    """
+    Compile the code detection and text cleaning patterns.
+    
+    Cached at module level, so all operator instances share the compiled patterns
+    instead of compiling them again.
+    
+    Returns:
+        Tuple of (code block patterns, union of the code block patterns, cleanup
+        patterns by name, code keywords, keyword search function)
+    """
+    # Code block detection patterns
+    code_patterns = [
+        # Fenced code blocks (``` or ~~~ delimited)
+        re.compile(r'```[\s\S]*?```', re.MULTILINE),
+        re.compile(r'~~~[\s\S]*?~~~', re.MULTILINE),
+        # Indented code blocks (4+ spaces at line start)
+        re.compile(r'^[ \t]{4,}.*$', re.MULTILINE),
+        # Inline code (single backticks)
+        re.compile(r'`[^`\n]+`'),
+        # HTML pre/code tags
+        re.compile(r'<pre[\s\S]*?</pre>', re.IGNORECASE),
+        re.compile(r'<code[\s\S]*?</code>', re.IGNORECASE),
+        # Common programming language patterns
+        re.compile(r'^(def|function|class|public|private|protected)\s+\w+', re.MULTILINE),
+        # Lines with programming characters
+        re.compile(r'.*[{}();=><\[\]]+.*', re.MULTILINE),
+    ]
+    
+    # All code patterns in one alternation for yes/no detection, each keeping its
+    # own flags as a scoped inline group, so the text is searched once instead of
+    # once per pattern (the separate patterns still mask blocks one after another)
+    code_any = re.compile('|'.join(
+        f'(?{flags}:{pattern.pattern})' if flags else f'(?:{pattern.pattern})'
+        for pattern in code_patterns
+        for flags in [''.join(letter for flag, letter in ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'))
+                              if pattern.flags & flag)]
+    ))
+    
+    # Text cleaning patterns
+    cleanup_patterns = {
+        'multiple_newlines': re.compile(r'\n{3,}'),
+        'multiple_spaces': re.compile(r' {2,}'),
+        'trailing_spaces': re.compile(r' +$', re.MULTILINE),
+        'mixed_whitespace': re.compile(r'[ \t]+'),
+        # Line-local patterns for regular text: indentation of lines with content,
+        # after a newline (starting with a literal, so the regex engine can skip
+        # ahead quickly) and at the very start
+        'line_indentation': re.compile(r'\n[^\S\n]+(?=\S)'),
+        'first_line_indentation': re.compile(r'[^\S\n]+(?=\S)'),
+        # Indentation of 4+ whitespace characters (only possible in regular text when
+        # some are not spaces or tabs, e.g. U+3000)
+        'deep_indentation': re.compile(r'^[^\S\n]{4,}(?=\S)', re.MULTILINE),
+    }
+    
+    # Code detection keywords (compiled for faster lookup)
+    code_keywords = {
+        'def ', 'function ', 'class ', 'import ', 'from ', 'return ', 
+        'if ', 'else:', 'for ', 'while ', 'try:', 'except:', 'var ',
+        'let ', 'const ', 'public ', 'private ', 'protected '
+    }
+    # All keywords in one alternation: a single C-level scan per line. The keywords
+    # are lowercase ASCII, so ASCII case-insensitive matching finds them exactly
+    # where `line.lower()` would, without building a lowercased copy of each line
+    code_keyword_search = re.compile(
+        '|'.join(map(re.escape, sorted(code_keywords))), re.IGNORECASE | re.ASCII
+    ).search
+    
+    return tuple(code_patterns), code_any, cleanup_patterns, frozenset(code_keywords), code_keyword_search
+
+
 @register_operator("remove_extra_spaces")
 class RemoveExtraSpacesMicroops(OperatorABC):
     """
@@ -26,6 +111,13 @@ class RemoveExtraSpacesMicroops(OperatorABC):
     - Enhanced processing logic with validation
     """
     
+    __slots__ = (
+        'error_handler', 'max_indent_preservation', 'code_detection_threshold',
+        'preserve_code_blocks', 'remove_trailing_spaces', 'code_patterns', '_code_any',
+        'cleanup_patterns', 'code_keywords', '_code_keyword_search',
+        '_code_decision_cache', '_code_decision_cache_lock',
+    )
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         Initialize the spaces removal micro-operation.
@@ -39,7 +131,6 @@ class RemoveExtraSpacesMicroops(OperatorABC):
         """
         super().__init__(config)
         self.error_handler = XErrorHandler()
-        self.retry_mechanism = XRetryMechanism(max_retries=2, base_delay=0.1)
         
         # Configuration parameters
         self.max_indent_preservation = self.config.get('max_indent_preservation', 4)
@@ -51,42 +142,21 @@ class RemoveExtraSpacesMicroops(OperatorABC):
         
         # Pre-compiled regex patterns for better performance
         self._compile_patterns()
+        
+        # LRU cache of code detection decisions keyed by the 16-byte xxh3-128 digest
+        # of the paragraph: repeated boilerplate paragraphs are classified once, and
+        # the cache does not keep the paragraphs themselves alive
+        self._code_decision_cache: "OrderedDict[bytes, bool]" = OrderedDict()
+        self._code_decision_cache_lock = threading.Lock()
 
     def _compile_patterns(self) -> None:
         """Compile and cache regex patterns for better performance."""
-        # Code block detection patterns
-        self.code_patterns = [
-            # Fenced code blocks (``` or ~~~ delimited)
-            re.compile(r'```[\s\S]*?```', re.MULTILINE),
-            re.compile(r'~~~[\s\S]*?~~~', re.MULTILINE),
-            # Indented code blocks (4+ spaces at line start)
-            re.compile(r'^[ \t]{4,}.*$', re.MULTILINE),
-            # Inline code (single backticks)
-            re.compile(r'`[^`\n]+`'),
-            # HTML pre/code tags
-            re.compile(r'<pre[\s\S]*?</pre>', re.IGNORECASE),
-            re.compile(r'<code[\s\S]*?</code>', re.IGNORECASE),
-            # Common programming language patterns
-            re.compile(r'^(def|function|class|public|private|protected)\s+\w+', re.MULTILINE),
-            # Lines with programming characters
-            re.compile(r'.*[{}();=><\[\]]+.*', re.MULTILINE),
-        ]
-        
-        # Text cleaning patterns
-        self.cleanup_patterns = {
-            'carriage_return': re.compile(r'\r'),
-            'multiple_newlines': re.compile(r'\n{3,}'),
-            'multiple_spaces': re.compile(r' {2,}'),
-            'trailing_spaces': re.compile(r' +$', re.MULTILINE),
-            'mixed_whitespace': re.compile(r'[ \t]+'),
-        }
-        
-        # Code detection keywords (compiled for faster lookup)
-        self.code_keywords = {
-            'def ', 'function ', 'class ', 'import ', 'from ', 'return ', 
-            'if ', 'else:', 'for ', 'while ', 'try:', 'except:', 'var ',
-            'let ', 'const ', 'public ', 'private ', 'protected '
-        }
+        code_patterns, self._code_any, cleanup_patterns, code_keywords, self._code_keyword_search = _build_patterns()
+        
+        # Containers are copied, so changing them on one operator leaves the others alone
+        self.code_patterns = list(code_patterns)
+        self.cleanup_patterns = dict(cleanup_patterns)
+        self.code_keywords = set(code_keywords)
 
     @staticmethod
     def get_desc(lang: str = "zh") -> str:
@@ -101,6 +171,32 @@ class RemoveExtraSpacesMicroops(OperatorABC):
         """
         Enhanced code detection with better performance.
         
+        Decisions are cached, so a text seen recently is not analyzed again.
+        
+        Args:
+            text: Text to analyze
+            
+        Returns:
+            bool: True if text is likely code
+        """
+        key = xxhash.xxh3_128_digest(text.encode("utf-8", "surrogatepass"))
+        with self._code_decision_cache_lock:
+            is_code = self._code_decision_cache.get(key)
+            if is_code is not None:
+                self._code_decision_cache.move_to_end(key)
+                return is_code
+        
+        is_code = self._detect_code(text)
+        with self._code_decision_cache_lock:
+            self._code_decision_cache[key] = is_code
+            if len(self._code_decision_cache) > _CODE_DECISION_CACHE_SIZE:
+                self._code_decision_cache.popitem(last=False)
+        return is_code
+    
+    def _detect_code(self, text: str) -> bool:
+        """
+        Detect code with pattern matching, then statistics over the lines.
+        
         Args:
             text: Text to analyze
             
@@ -111,12 +207,19 @@ class RemoveExtraSpacesMicroops(OperatorABC):
             return False
             
         # Quick pattern matching first
-        for pattern in self.code_patterns:
-            if pattern.search(text):
-                return True
+        if self._code_any.search(text):
+            return True
         
-        # Statistical analysis for borderline cases
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        # Statistical analysis for borderline cases. The pattern search above failed,
+        # so no line holds any of `{}();=><[]`: assignments, calls, `;`/`{`/`}` line
+        # endings, `->` and `=>` cannot occur, and only keywords and `::` are left
+        # as indicators. Without either anywhere in the text (a line match is also
+        # a whole-text match) no line can count, so the per-line scan is skipped
+        keyword_search = self._code_keyword_search
+        if '::' not in text and not keyword_search(text):
+            return 0 > self.code_detection_threshold
+        
+        lines = [line for line in map(str.strip, text.split('\n')) if line]
         if not lines:
             return False
         
@@ -124,19 +227,8 @@ class RemoveExtraSpacesMicroops(OperatorABC):
         total_lines = len(lines)
         
         for line in lines:
-            # Check for programming keywords (optimized with set lookup)
-            if any(keyword in line.lower() for keyword in self.code_keywords):
-                code_indicators += 1
-                continue
-                
-            # Check for other code patterns
-            if any([
-                ' = ' in line and not line.startswith('#'),  # Assignment
-                line.count('(') + line.count(')') >= 2,      # Function calls
-                line.endswith(';') or line.endswith('{') or line.endswith('}'),  # Syntax
-                line.startswith('    ') and len(line) > 4,   # Indentation
-                '->' in line or '=>' in line or '::' in line # Language specific
-            ]):
+            # Check for programming keywords, then for language specific syntax
+            if keyword_search(line) or '::' in line:
                 code_indicators += 1
         
         return (code_indicators / total_lines) > self.code_detection_threshold
@@ -155,16 +247,25 @@ class RemoveExtraSpacesMicroops(OperatorABC):
             return text, [], ""
             
         code_blocks = []
-        placeholder_pattern = "___CODE_BLOCK_PLACEHOLDER_{}_END___"
+        placeholder_pattern = _PLACEHOLDER_PATTERN
         
-        # Extract all code blocks (process in reverse to avoid index shifting)
+        # Extract all code blocks, pattern by pattern: blocks masked by one pattern are
+        # not scanned again by the next. Each pattern rebuilds the text with a single
+        # join instead of copying the whole text once per block
         for pattern in self.code_patterns:
             matches = list(pattern.finditer(text))
-            for match in reversed(matches):
-                code_content = match.group()
-                placeholder = placeholder_pattern.format(len(code_blocks))
-                code_blocks.append(code_content)
-                text = text[:match.start()] + placeholder + text[match.end():]
+            if not matches:
+                continue
+            
+            parts = []
+            cursor = 0
+            for match in matches:
+                parts.append(text[cursor:match.start()])
+                parts.append(placeholder_pattern.format(len(code_blocks)))
+                code_blocks.append(match.group())
+                cursor = match.end()
+            parts.append(text[cursor:])
+            text = ''.join(parts)
         
         return text, code_blocks, placeholder_pattern
     
@@ -172,6 +273,10 @@ class RemoveExtraSpacesMicroops(OperatorABC):
         """
         Restore preserved code blocks.
         
+        All placeholders are replaced in a single scan of the text, instead of one
+        `str.replace` scan per block. A block may contain the placeholders of blocks
+        masked before it (by an earlier pattern); these are resolved first.
+        
         Args:
             text: Text with placeholders
             code_blocks: List of preserved code blocks
@@ -180,9 +285,71 @@ class RemoveExtraSpacesMicroops(OperatorABC):
         Returns:
             Text with restored code blocks
         """
-        for i, code_block in enumerate(code_blocks):
-            placeholder = placeholder_pattern.format(i)
-            text = text.replace(placeholder, code_block)
+        resolved = []
+        
+        def lookup(match: re.Match) -> str:
+            index = int(match.group(1))
+            return resolved[index] if index < len(resolved) else match.group()
+        
+        marker = placeholder_pattern.split('{}', 1)[0]
+        for code_block in code_blocks:
+            resolved.append(_PLACEHOLDER_RE.sub(lookup, code_block) if marker in code_block else code_block)
+        return _PLACEHOLDER_RE.sub(lookup, text)
+    
+    def _clean_regular_text(self, text: str) -> str:
+        """
+        Clean lines of regular (non-code) text with line-local regex passes.
+        
+        Lines with content lose trailing whitespace and keep their indentation as
+        a single space (none if `max_indent_preservation` is 0), or as up to
+        `max_indent_preservation` spaces when it is 4+ characters long; every other
+        run of spaces and tabs becomes a single space.
+        
+        Args:
+            text: Regular text to clean
+            
+        Returns:
+            Cleaned text
+        """
+        # A line indented by 4+ whitespace characters keeps its indentation capped at
+        # `max_indent_preservation` spaces: 4+ spaces make it an indented code line,
+        # whose inner runs of spaces are collapsed but not its tabs. Such lines are
+        # rare (regular text has no 4+ spaces or tabs there), so only then is the
+        # text cleaned line by line
+        deep_indentation = self.cleanup_patterns['deep_indentation']
+        if self.max_indent_preservation >= 4 and deep_indentation.search(text):
+            lines = text.split('\n')
+            for i, line in enumerate(lines):
+                match = deep_indentation.match(line)
+                if match:
+                    lines[i] = (' ' * min(match.end(), self.max_indent_preservation)
+                                + self.cleanup_patterns['multiple_spaces'].sub(' ', line.strip()))
+                else:
+                    lines[i] = self._clean_regular_text(line)
+            return '\n'.join(lines)
+        
+        # Any other line keeps its indentation as a single space: capping it at
+        # `max_indent_preservation` spaces and then collapsing runs of spaces would
+        # give the same result
+        indent = ' ' if self.max_indent_preservation > 0 else ''
+        
+        # Trailing whitespace of lines with content
+        text = '\n'.join([line.rstrip() or line for line in text.split('\n')])
+        
+        # Indentation, with a constant replacement (no Python callback per line)
+        text = self.cleanup_patterns['line_indentation'].sub('\n' + indent, text)
+        match = self.cleanup_patterns['first_line_indentation'].match(text)
+        if match:
+            text = indent + text[match.end():]
+        
+        # Mixed whitespace; regular text needs no per-line code check, as its
+        # paragraphs were already classified as non-code. Tabs become spaces first,
+        # so the regex only has to touch actual runs of spaces (`[ \t]+` would
+        # replace every single space between words as well)
+        if '\t' in text:
+            text = text.replace('\t', ' ')
+        if '  ' in text:
+            text = self.cleanup_patterns['multiple_spaces'].sub(' ', text)
         return text
     
     def _clean_text_content(self, text: str) -> str:
@@ -195,71 +362,44 @@ class RemoveExtraSpacesMicroops(OperatorABC):
         Returns:
             Cleaned text
         """
+        # Each whole-text pass below is skipped when a substring test (a single C-level
+        # scan, without building a new string) shows it has nothing to change
+        
         # Step 1: Remove carriage returns
-        text = self.cleanup_patterns['carriage_return'].sub('', text)
+        if '\r' in text:
+            text = text.replace('\r', '')
         
         # Step 2: Normalize multiple newlines
-        text = self.cleanup_patterns['multiple_newlines'].sub('\n\n', text)
+        if '\n\n\n' in text:
+            text = self.cleanup_patterns['multiple_newlines'].sub('\n\n', text)
         
-        # Step 3: Process paragraphs individually
+        # Step 3: Process paragraphs individually; consecutive regular-text paragraphs
+        # are cleaned together (mixed whitespace included), as the cleaning never
+        # crosses a line, while code paragraphs are kept as they are
         paragraphs = text.split('\n\n')
         processed_paragraphs = []
+        text_paragraphs = []
         
         for paragraph in paragraphs:
-            if not paragraph.strip():
-                processed_paragraphs.append(paragraph)
-                continue
-                
             # Check if paragraph contains code
-            if self._is_likely_code(paragraph):
+            if paragraph.strip() and self._is_likely_code(paragraph):
+                if text_paragraphs:
+                    processed_paragraphs.append(self._clean_regular_text('\n\n'.join(text_paragraphs)))
+                    text_paragraphs = []
                 # Preserve code formatting
                 processed_paragraphs.append(paragraph)
             else:
-                # Clean regular text
-                lines = paragraph.split('\n')
-                processed_lines = []
-                
-                for line in lines:
-                    if not line.strip():
-                        processed_lines.append(line)
-                        continue
-                        
-                    # Preserve reasonable indentation
-                    leading_spaces = len(line) - len(line.lstrip())
-                    content = line.strip()
-                    
-                    if content:
-                        # Clean multiple spaces in content
-                        cleaned_content = self.cleanup_patterns['multiple_spaces'].sub(' ', content)
-                        
-                        # Reconstruct with preserved indentation
-                        if leading_spaces > 0:
-                            indent = ' ' * min(leading_spaces, self.max_indent_preservation)
-                            processed_line = indent + cleaned_content
-                        else:
-                            processed_line = cleaned_content
-                    else:
-                        processed_line = line
-                    
-                    processed_lines.append(processed_line)
-                
-                processed_paragraphs.append('\n'.join(processed_lines))
+                text_paragraphs.append(paragraph)
+        if text_paragraphs:
+            processed_paragraphs.append(self._clean_regular_text('\n\n'.join(text_paragraphs)))
         
         text = '\n\n'.join(processed_paragraphs)
         
         # Step 4: Additional cleanup
-        if self.remove_trailing_spaces:
+        if self.remove_trailing_spaces and (' \n' in text or text.endswith(' ')):
             text = self.cleanup_patterns['trailing_spaces'].sub('', text)
         
-        # Step 5: Normalize mixed whitespace (except in code)
-        # Only apply to non-code segments
-        lines = text.split('\n')
-        for i, line in enumerate(lines):
-            if not self._is_likely_code(line):
-                lines[i] = self.cleanup_patterns['mixed_whitespace'].sub(' ', line)
-        text = '\n'.join(lines)
-        
-        # Step 6: Strip document-level whitespace
+        # Step 5: Strip document-level whitespace
         text = text.strip()
         
         return text
@@ -277,7 +417,7 @@ class RemoveExtraSpacesMicroops(OperatorABC):
         if not input_string:
             return input_string
 
-        def _process_text() -> str:
+        try:
             # Step 1: Preserve code blocks
             output_string, code_blocks, placeholder_pattern = self._preserve_code_blocks(input_string)
             
@@ -288,19 +428,17 @@ class RemoveExtraSpacesMicroops(OperatorABC):
             if code_blocks:
                 output_string = self._restore_code_blocks(output_string, code_blocks, placeholder_pattern)
             
+            xlogger.debug(f"Successfully processed text: {len(input_string)} -> {len(output_string)} characters")
             return output_string
-
-        try:
-            # Use retry mechanism for processing
-            result = self.retry_mechanism.execute(_process_text)
-            xlogger.debug(f"Successfully processed text: {len(input_string)} -> {len(result)} characters")
-            return result
             
         except Exception as e:
             error_info = self.error_handler.handle_error(
-                e, 
-                context=f"Processing text with length {len(input_string)}",
-                operation="remove_extra_spaces"
+                e,
+                context={
+                    "operation": "remove_extra_spaces",
+                    "text_length": len(input_string)
+                },
+                should_raise=False
             )
             xlogger.error(f"Error in removing extra spaces: {error_info}")
             return input_string  # Return original on error
\ No newline at end of file
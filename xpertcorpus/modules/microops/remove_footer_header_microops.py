@@ -5,13 +5,137 @@ Micro-ops: remove footer and header
 @date:   2025-08-13
 """
 import re
-from typing import Dict, Any, Optional, List
+import functools
+
+from typing import Dict, Any, FrozenSet, Optional, List, Pattern, Tuple
 
 from xpertcorpus.utils import xlogger
-from xpertcorpus.utils.xerror_handler import XErrorHandler, XRetryMechanism
+from xpertcorpus.utils.xerror_handler import XErrorHandler
 from xpertcorpus.modules.others.xoperator import OperatorABC, register_operator
 
 
+# Short lines that are just a page number, the statistics categories of removed
+# lines (page numbers, copyright notices), and line separators
+_DIGITS_ONLY_PATTERN = re.compile(r'^\d+$')
+_PAGE_NUMBER_STAT_PATTERN = re.compile(r'^\d+$|^page\s+\d+|^\d+\s*/\s*\d+$', re.IGNORECASE)
+_COPYRIGHT_STAT_PATTERN = re.compile(r'.*copyright.*|.*©.*|\(c\).*|.*all rights reserved.*', re.IGNORECASE)
+_LINE_SEPARATOR_PATTERN = re.compile(r'\r\n|\r|\n')
+
+
+@functools.lru_cache(maxsize=16)
+def _build_removal_patterns(remove_page_numbers: bool,
+                            remove_copyright: bool,
+                            remove_navigation: bool,
+                            custom_patterns: Tuple[str, ...]) -> Tuple[Tuple[Pattern[str], ...], Optional[Pattern[str]], Tuple[Pattern[str], ...], Optional[FrozenSet[str]]]:
+    """
+    Compile the footer/header removal patterns for one configuration.
+    
+    Cached at module level, so operator instances with the same configuration
+    share the compiled patterns instead of compiling them again (an invalid custom
+    pattern is therefore reported once).
+    
+    Args:
+        remove_page_numbers: Whether to remove page number patterns
+        remove_copyright: Whether to remove copyright notices
+        remove_navigation: Whether to remove navigation text
+        custom_patterns: Additional regex patterns to remove
+        
+    Returns:
+        Tuple of (removal patterns, union of the patterns or None, patterns matched
+        separately, characters a removable line can start with or None)
+    """
+    patterns = []
+    
+    # Page number patterns
+    if remove_page_numbers:
+        page_patterns = [
+            r'^page\s+\d+\s*$',
+            r'^\d+\s*$',
+            r'^-\s*\d+\s*-\s*$',
+            r'^\[\s*\d+\s*\]$',
+            r'^\d+\s*/\s*\d+$',
+            r'^\d+\s+of\s+\d+$',
+        ]
+        patterns.extend(page_patterns)
+    
+    # Copyright patterns
+    if remove_copyright:
+        copyright_patterns = [
+            r'^\s*©.*\d{4}.*$',
+            r'^\s*copyright.*\d{4}.*$',
+            r'^\s*\(c\).*\d{4}.*$',
+            r'^\s*all rights reserved.*$',
+            r'^\s*proprietary and confidential.*$',
+        ]
+        patterns.extend(copyright_patterns)
+    
+    # Navigation patterns
+    if remove_navigation:
+        nav_patterns = [
+            r'^\s*next\s*\|\s*previous\s*$',
+            r'^\s*home\s*\|\s*back\s*\|\s*forward\s*$',
+            r'^\s*click here.*$',
+            r'^\s*continue reading.*$',
+            r'^\s*read more.*$',
+            r'^\s*back to top.*$',
+            r'^\s*table of contents.*$',
+            r'^\s*index\s*$',
+        ]
+        patterns.extend(nav_patterns)
+    
+    # Common header/footer patterns
+    common_patterns = [
+        r'^\s*printed on.*\d{4}.*$',
+        r'^\s*generated on.*\d{4}.*$',
+        r'^\s*last updated.*\d{4}.*$',
+        r'^\s*confidential.*$',
+        r'^\s*draft.*$',
+        r'^\s*version\s+\d+.*$',
+        r'^\s*document\s+\d+.*$',
+    ]
+    patterns.extend(common_patterns)
+    
+    # Add custom patterns
+    patterns.extend(custom_patterns)
+    
+    # Compile all patterns
+    removal_patterns = []
+    for pattern in patterns:
+        try:
+            compiled = re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+            removal_patterns.append(compiled)
+        except re.error as e:
+            xlogger.warning(f"Invalid regex pattern '{pattern}': {e}")
+    
+    # All valid patterns in one alternation, so a line is matched once instead of
+    # once per pattern. Patterns with groups are kept out (their numbered
+    # backreferences would shift), as is everything if the alternation does not
+    # compile (e.g. a custom pattern with global inline flags)
+    union_sources = [compiled.pattern for compiled in removal_patterns if not compiled.groups]
+    separate_patterns = [compiled for compiled in removal_patterns if compiled.groups]
+    removal_union = None
+    if union_sources:
+        try:
+            removal_union = re.compile(
+                '|'.join(f'(?:{source})' for source in union_sources),
+                re.IGNORECASE | re.MULTILINE
+            )
+        except re.error:
+            separate_patterns = list(removal_patterns)
+    
+    # Characters a line must start with (after leading whitespace) to match any
+    # built-in pattern, decimal digits aside: opening symbols, and the initials
+    # of the keywords in either case (plus the dotless/dotted i that
+    # IGNORECASE matches with 'i'). Custom patterns may match any line, so
+    # they disable this shortcut
+    initials = 'acbdghilnprtv'
+    fast_first_chars = None if custom_patterns else frozenset(
+        '©(-[' + initials + initials.upper() + '\u0131\u0130'
+    )
+    
+    return tuple(removal_patterns), removal_union, tuple(separate_patterns), fast_first_chars
+
+
 @register_operator("remove_footer_header")
 class RemoveFooterHeaderMicroops(OperatorABC):
     """
@@ -25,6 +149,12 @@ class RemoveFooterHeaderMicroops(OperatorABC):
     - Preserves main content structure
     """
     
+    __slots__ = (
+        'error_handler', 'removal_patterns', 'removal_union', '_separate_removal_patterns',
+        '_fast_first_chars', 'digits_only_pattern', 'page_number_stat_pattern',
+        'copyright_stat_pattern', 'line_separator_pattern', 'stats',
+    )
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         Initialize the footer/header removal micro-operation.
@@ -74,74 +204,21 @@ class RemoveFooterHeaderMicroops(OperatorABC):
     
     def _compile_patterns(self):
         """Compile regex patterns for footer/header detection."""
-        patterns = []
-        
-        # Page number patterns
-        if self.config['remove_page_numbers']:
-            page_patterns = [
-                r'^page\s+\d+\s*$',
-                r'^\d+\s*$',
-                r'^-\s*\d+\s*-\s*$',
-                r'^\[\s*\d+\s*\]$',
-                r'^\d+\s*/\s*\d+$',
-                r'^\d+\s+of\s+\d+$',
-            ]
-            patterns.extend(page_patterns)
-        
-        # Copyright patterns
-        if self.config['remove_copyright']:
-            copyright_patterns = [
-                r'^\s*©.*\d{4}.*$',
-                r'^\s*copyright.*\d{4}.*$',
-                r'^\s*\(c\).*\d{4}.*$',
-                r'^\s*all rights reserved.*$',
-                r'^\s*proprietary and confidential.*$',
-            ]
-            patterns.extend(copyright_patterns)
-        
-        # Navigation patterns
-        if self.config['remove_navigation']:
-            nav_patterns = [
-                r'^\s*next\s*\|\s*previous\s*$',
-                r'^\s*home\s*\|\s*back\s*\|\s*forward\s*$',
-                r'^\s*click here.*$',
-                r'^\s*continue reading.*$',
-                r'^\s*read more.*$',
-                r'^\s*back to top.*$',
-                r'^\s*table of contents.*$',
-                r'^\s*index\s*$',
-            ]
-            patterns.extend(nav_patterns)
-        
-        # Common header/footer patterns
-        common_patterns = [
-            r'^\s*printed on.*\d{4}.*$',
-            r'^\s*generated on.*\d{4}.*$',
-            r'^\s*last updated.*\d{4}.*$',
-            r'^\s*confidential.*$',
-            r'^\s*draft.*$',
-            r'^\s*version\s+\d+.*$',
-            r'^\s*document\s+\d+.*$',
-        ]
-        patterns.extend(common_patterns)
-        
-        # Add custom patterns
-        patterns.extend(self.config['custom_patterns'])
-        
-        # Compile all patterns
-        self.removal_patterns = []
-        for pattern in patterns:
-            try:
-                compiled = re.compile(pattern, re.IGNORECASE | re.MULTILINE)
-                self.removal_patterns.append(compiled)
-            except re.error as e:
-                xlogger.warning(f"Invalid regex pattern '{pattern}': {e}")
-        
-        # Line separator detection
-        self.line_separator_pattern = re.compile(r'\r\n|\r|\n')
+        removal_patterns, self.removal_union, self._separate_removal_patterns, self._fast_first_chars = (
+            _build_removal_patterns(
+                bool(self.config['remove_page_numbers']),
+                bool(self.config['remove_copyright']),
+                bool(self.config['remove_navigation']),
+                tuple(self.config['custom_patterns'])
+            )
+        )
+        self.removal_patterns = list(removal_patterns)
         
-        # Whitespace normalization
-        self.whitespace_pattern = re.compile(r'\s+')
+        # Patterns shared by all configurations
+        self.digits_only_pattern = _DIGITS_ONLY_PATTERN
+        self.page_number_stat_pattern = _PAGE_NUMBER_STAT_PATTERN
+        self.copyright_stat_pattern = _COPYRIGHT_STAT_PATTERN
+        self.line_separator_pattern = _LINE_SEPARATOR_PATTERN
     
     @staticmethod
     def get_desc(lang: str = "zh") -> str:
@@ -166,12 +243,7 @@ class RemoveFooterHeaderMicroops(OperatorABC):
         if not input_string or not isinstance(input_string, str):
             return input_string or ""
         
-        return self.error_handler.execute_with_retry(
-            func=self._remove_footer_header,
-            args=(input_string,),
-            max_retries=2,
-            operation_name="Footer/header removal"
-        )
+        return self._remove_footer_header(input_string)
     
     def _remove_footer_header(self, text: str) -> str:
         """
@@ -191,57 +263,63 @@ class RemoveFooterHeaderMicroops(OperatorABC):
             if not lines:
                 return text
             
+            # Strip each line once, for all the checks below
+            stripped_lines = [line.strip() for line in lines]
+            num_lines = len(lines)
+            
+            # Configuration and bound method read once, not on every line
+            min_line_length = self.config['min_line_length']
+            should_remove_line = self._should_remove_line
+            
             # Track removed lines
             headers_removed = 0
             footers_removed = 0
             
             # Process header lines (from start)
             start_idx = 0
-            max_header = min(len(lines), self.config['max_header_lines'])
+            max_header = min(num_lines, self.config['max_header_lines'])
             
             for i in range(max_header):
-                line = lines[i].strip()
-                if self._should_remove_line(line):
+                line = stripped_lines[i]
+                if should_remove_line(line):
                     start_idx = i + 1
                     headers_removed += 1
-                elif line and len(line) >= self.config['min_line_length']:
+                elif line and len(line) >= min_line_length:
                     # Found substantial content, stop header removal
                     break
             
             # Process footer lines (from end)
-            end_idx = len(lines)
-            max_footer = min(len(lines) - start_idx, self.config['max_footer_lines'])
+            end_idx = num_lines
+            max_footer = min(num_lines - start_idx, self.config['max_footer_lines'])
             
             for i in range(1, max_footer + 1):
-                line_idx = len(lines) - i
+                line_idx = num_lines - i
                 if line_idx < start_idx:
                     break
                 
-                line = lines[line_idx].strip()
-                if self._should_remove_line(line):
+                line = stripped_lines[line_idx]
+                if should_remove_line(line):
                     end_idx = line_idx
                     footers_removed += 1
-                elif line and len(line) >= self.config['min_line_length']:
+                elif line and len(line) >= min_line_length:
                     # Found substantial content, stop footer removal
                     break
             
-            # Extract clean content
-            cleaned_lines = lines[start_idx:end_idx]
-            
-            # Remove matching patterns from remaining lines
+            # Remove matching patterns from remaining lines (the clean content): find
+            # them first, then keep the runs of lines between them as slices
+            removed_indices = [i for i in range(start_idx, end_idx) if should_remove_line(stripped_lines[i])]
             final_lines = []
-            for line in cleaned_lines:
-                if not self._should_remove_line(line.strip()):
-                    final_lines.append(line)
-                else:
-                    # Count specific pattern types
-                    self._count_pattern_match(line.strip())
+            run_start = start_idx
+            for i in removed_indices:
+                final_lines.extend(lines[run_start:i])
+                run_start = i + 1
+                # Count specific pattern types
+                self._count_pattern_match(stripped_lines[i])
+            final_lines.extend(lines[run_start:end_idx])
             
-            # Reconstruct text
+            # Reconstruct text; whitespace inside the lines is left to the extra spaces
+            # micro-operation (collapsing all whitespace here used to join the lines)
             text = '\n'.join(final_lines)
-            
-            # Clean up extra whitespace
-            text = self.whitespace_pattern.sub(' ', text)
             text = text.strip()
             
             # Update statistics
@@ -273,14 +351,23 @@ class RemoveFooterHeaderMicroops(OperatorABC):
         if not line:
             return False
         
+        # Most lines cannot match any pattern, as their first character shows
+        first_chars = self._fast_first_chars
+        if first_chars is not None:
+            stripped = line.lstrip()
+            if not stripped or not (stripped[0] in first_chars or stripped[0].isdecimal()):
+                return False
+        
         # Too short lines are likely not main content
         if len(line) < self.config['min_line_length']:
             # But check if it's just a page number or similar
-            if re.match(r'^\d+$', line.strip()):
+            if self.digits_only_pattern.match(line.strip()):
                 return True
         
         # Check against all patterns
-        for pattern in self.removal_patterns:
+        if self.removal_union is not None and self.removal_union.match(line):
+            return True
+        for pattern in self._separate_removal_patterns:
             if pattern.match(line):
                 return True
         
@@ -294,11 +381,11 @@ class RemoveFooterHeaderMicroops(OperatorABC):
             line: Line that matched a pattern
         """
         # Check for page numbers
-        if re.match(r'^\d+$|^page\s+\d+|^\d+\s*/\s*\d+$', line, re.IGNORECASE):
+        if self.page_number_stat_pattern.match(line):
             self.stats['page_numbers_removed'] += 1
         
         # Check for copyright
-        elif re.match(r'.*copyright.*|.*©.*|\(c\).*|.*all rights reserved.*', line, re.IGNORECASE):
+        elif self.copyright_stat_pattern.match(line):
             self.stats['copyright_removed'] += 1
     
     def get_stats(self) -> Dict[str, Any]:
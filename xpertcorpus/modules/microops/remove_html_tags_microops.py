@@ -5,14 +5,64 @@ Micro-ops: remove HTML tags
 @date:   2025-08-13
 """
 import re
-from typing import Dict, Any, Optional
+import functools
+from typing import Dict, Any, Optional, Pattern, Tuple
 from html import unescape
 
 from xpertcorpus.utils import xlogger
-from xpertcorpus.utils.xerror_handler import XErrorHandler, XRetryMechanism
+from xpertcorpus.utils.xerror_handler import XErrorHandler
 from xpertcorpus.modules.others.xoperator import OperatorABC, register_operator
 
 
+# Placeholder for a whitelist tag while the other tags are removed (NUL never occurs in a tag)
+_PRESERVED_TAG_PLACEHOLDER = '\x00P{}\x00'
+_PRESERVED_TAG_PATTERN = re.compile(r'\x00P(\d+)\x00')
+
+# Basic HTML tag pattern (matches opening and closing tags, not a bare `<>`)
+_HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Style and script content removal
+_STYLE_SCRIPT_PATTERN = re.compile(
+    r'<(style|script)[^>]*>.*?</\1>',
+    re.IGNORECASE | re.DOTALL
+)
+
+# HTML comments removal (unrolled `<!--.*?-->`, the comment body never backtracks)
+_COMMENT_PATTERN = re.compile(r'<!--[^-]*(?:-(?!->)[^-]*)*-->')
+
+# Link extraction pattern
+_LINK_PATTERN = re.compile(
+    r'<a[^>]*href=["\']([^"\']*)["\'][^>]*>(.*?)</a>',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Multiple whitespace normalization
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# HTML entity pattern for manual decoding if needed
+_ENTITY_PATTERN = re.compile(r'&[a-zA-Z0-9#][a-zA-Z0-9]{1,7};')
+
+
+@functools.lru_cache(maxsize=16)
+def _build_whitelist_pattern(whitelist_tags: Tuple[str, ...]) -> Optional[Pattern[str]]:
+    """
+    Compile the pattern of whitelist tags, shared by all instances with the same whitelist.
+    
+    Args:
+        whitelist_tags: Tags to preserve
+        
+    Returns:
+        Compiled pattern, or None if the whitelist is empty
+    """
+    if not whitelist_tags:
+        return None
+    whitelist = '|'.join(re.escape(tag) for tag in whitelist_tags)
+    return re.compile(
+        f'</?({whitelist})(?:[^>]*)>',
+        re.IGNORECASE
+    )
+
+
 @register_operator("remove_html_tags")
 class RemoveHTMLTagsMicroops(OperatorABC):
     """
@@ -72,45 +122,16 @@ class RemoveHTMLTagsMicroops(OperatorABC):
     
     def _compile_patterns(self):
         """Compile regex patterns for HTML processing."""
-        # Basic HTML tag pattern (matches opening and closing tags)
-        self.html_tag_pattern = re.compile(
-            r'<[^>]*>', 
-            re.IGNORECASE | re.DOTALL
-        )
-        
-        # Style and script content removal
-        self.style_script_pattern = re.compile(
-            r'<(style|script)[^>]*>.*?</\1>',
-            re.IGNORECASE | re.DOTALL
-        )
-        
-        # HTML comments removal
-        self.comment_pattern = re.compile(
-            r'<!--.*?-->',
-            re.DOTALL
-        )
-        
-        # Link extraction pattern
-        self.link_pattern = re.compile(
-            r'<a[^>]*href=["\']([^"\']*)["\'][^>]*>(.*?)</a>',
-            re.IGNORECASE | re.DOTALL
-        )
+        # Patterns shared by all configurations
+        self.html_tag_pattern = _HTML_TAG_PATTERN
+        self.style_script_pattern = _STYLE_SCRIPT_PATTERN
+        self.comment_pattern = _COMMENT_PATTERN
+        self.link_pattern = _LINK_PATTERN
+        self.whitespace_pattern = _WHITESPACE_PATTERN
+        self.entity_pattern = _ENTITY_PATTERN
         
         # Whitelist tag pattern (if specified)
-        if self.config['whitelist_tags']:
-            whitelist = '|'.join(re.escape(tag) for tag in self.config['whitelist_tags'])
-            self.whitelist_pattern = re.compile(
-                f'</?({whitelist})(?:[^>]*)>',
-                re.IGNORECASE
-            )
-        else:
-            self.whitelist_pattern = None
-        
-        # Multiple whitespace normalization
-        self.whitespace_pattern = re.compile(r'\s+')
-        
-        # HTML entity pattern for manual decoding if needed
-        self.entity_pattern = re.compile(r'&[a-zA-Z0-9#][a-zA-Z0-9]{1,7};')
+        self.whitelist_pattern = _build_whitelist_pattern(tuple(self.config['whitelist_tags']))
     
     @staticmethod
     def get_desc(lang: str = "zh") -> str:
@@ -135,12 +156,7 @@ class RemoveHTMLTagsMicroops(OperatorABC):
         if not input_string or not isinstance(input_string, str):
             return input_string or ""
         
-        return self.error_handler.execute_with_retry(
-            func=self._remove_html_tags,
-            args=(input_string,),
-            max_retries=2,
-            operation_name="HTML tags removal"
-        )
+        return self._remove_html_tags(input_string)
     
     def _remove_html_tags(self, text: str) -> str:
         """
@@ -155,8 +171,11 @@ class RemoveHTMLTagsMicroops(OperatorABC):
         try:
             original_text = text
             
-            # 1. Remove comments first
-            text = self.comment_pattern.sub('', text)
+            # 1. Remove comments first; only up to the last `-->`, as an unclosed
+            # `<!--` after it would otherwise be scanned to the end of the text
+            comments_end = text.rfind('-->') + 3
+            if comments_end > 2:
+                text = self.comment_pattern.sub('', text[:comments_end]) + text[comments_end:]
             
             # 2. Remove style and script content if configured
             if self.config['remove_style_script']:
@@ -177,23 +196,25 @@ class RemoveHTMLTagsMicroops(OperatorABC):
             # 4. Handle whitelist tags (preserve them)
             preserved_tags = []
             if self.whitelist_pattern:
-                preserved_tags = self.whitelist_pattern.findall(text)
-                # Temporarily replace whitelist tags with placeholders
-                for i, tag_match in enumerate(self.whitelist_pattern.finditer(text)):
-                    text = text.replace(tag_match.group(0), f"__PRESERVE_TAG_{i}__")
+                def preserve_tag(match):
+                    preserved_tags.append(match.group(0))
+                    return _PRESERVED_TAG_PLACEHOLDER.format(len(preserved_tags) - 1)
+                
+                # Temporarily replace whitelist tags with placeholders, in one pass
+                text = self.whitelist_pattern.sub(preserve_tag, text)
             
-            # 5. Remove all remaining HTML tags
-            tags_before = len(self.html_tag_pattern.findall(text))
-            text = self.html_tag_pattern.sub(
+            # 5. Remove all remaining HTML tags, likewise only up to the last `>`
+            tags_end = text.rfind('>') + 1
+            tags_text, tags_removed = self.html_tag_pattern.subn(
                 ' ' if self.config['replace_with_space'] else '', 
-                text
+                text[:tags_end]
             )
-            self.stats['tags_removed'] += tags_before
+            text = tags_text + text[tags_end:]
+            self.stats['tags_removed'] += tags_removed
             
             # 6. Restore whitelist tags if any
             if preserved_tags:
-                for i, tag in enumerate(preserved_tags):
-                    text = text.replace(f"__PRESERVE_TAG_{i}__", tag)
+                text = _PRESERVED_TAG_PATTERN.sub(lambda match: preserved_tags[int(match.group(1))], text)
             
             # 7. Decode HTML entities if configured
             if self.config['decode_entities']:
@@ -5,14 +5,139 @@ Micro-ops: remove non-printable characters
 @date:   2025-08-13
 """
 import re
+import functools
 import unicodedata
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Pattern, Sequence, Union
 
 from xpertcorpus.utils import xlogger
-from xpertcorpus.utils.xerror_handler import XErrorHandler, XRetryMechanism
+from xpertcorpus.utils.xutils import collapse_whitespace_batch
+from xpertcorpus.utils.xerror_handler import XErrorHandler
 from xpertcorpus.modules.others.xoperator import OperatorABC, register_operator
 
 
+# Whitespace characters kept when `preserve_whitespace` is enabled
+_PRESERVED_WHITESPACE = frozenset(map(ord, '\t\n\r '))
+
+# ASCII printable codepoints (0x20-0x7E), the characters allowed in strict ASCII mode
+_ASCII_PRINTABLE = frozenset(range(0x20, 0x7F))
+
+# Unicode categories of printable characters: all letters (L*), numbers (N*),
+# punctuation (P*) and symbols (S*)
+_PRINTABLE_CATEGORIES = frozenset({
+    'Lu', 'Ll', 'Lt', 'Lm', 'Lo',
+    'Nd', 'Nl', 'No',
+    'Pc', 'Pd', 'Pe', 'Pf', 'Pi', 'Po', 'Ps',
+    'Sc', 'Sk', 'Sm', 'So',
+})
+
+# Per-codepoint actions of `run_batch`: keep, control char, BOM/zero-width, filtered out
+# by the translation table; codepoints not classified yet are marked as unclassified
+_KEEP, _CONTROL, _DELETE, _FILTER = range(4)
+_UNCLASSIFIED = 0xFF
+
+# Number of Unicode codepoints
+_NUM_CODEPOINTS = 0x110000
+
+
+# Whitespace normalization
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=None)
+def _build_non_printable_pattern(remove_bom: bool, preserve_zero_width: bool) -> Pattern[str]:
+    """
+    Compile the pattern of characters removed before the printable filtering,
+    shared by all instances with the same configuration.
+    
+    Args:
+        remove_bom: Remove Byte Order Mark
+        preserve_zero_width: Keep zero-width characters
+        
+    Returns:
+        Compiled pattern; control characters match its `control` group
+    """
+    # Control characters (0x00-0x1F, 0x7F-0x9F), replaced by the replacement text
+    control_chars = r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]'
+    
+    # Characters deleted outright: Byte Order Mark (BOM) and zero-width characters
+    deleted_chars = ''
+    if remove_bom:
+        deleted_chars += r'\uFEFF\uFFFE'
+    if not preserve_zero_width:
+        deleted_chars += r'\u200B-\u200F\u2028-\u202E\u2060-\u2064\u206A-\u206F'
+    
+    # All of them in one character-class alternation, so the text is scanned once
+    non_printable = f'(?P<control>{control_chars})'
+    if deleted_chars:
+        non_printable += f'|[{deleted_chars}]'
+    return re.compile(non_printable)
+
+
+def _is_printable_codepoint(codepoint: int, preserve_whitespace: bool) -> bool:
+    """
+    Check if a Unicode codepoint is printable.
+    
+    Args:
+        codepoint: Codepoint to check
+        preserve_whitespace: Whether basic whitespace and space separators are kept
+        
+    Returns:
+        True if the codepoint is printable, False otherwise
+    """
+    # Always preserve configured whitespace
+    if preserve_whitespace and codepoint in _PRESERVED_WHITESPACE:
+        return True
+    
+    # Letters, numbers, punctuation and symbols are printable
+    category = unicodedata.category(chr(codepoint))
+    if category in _PRINTABLE_CATEGORIES:
+        return True
+    
+    # Space separators only if preserving whitespace
+    return category == 'Zs' and preserve_whitespace
+
+
+class _TranslationTable(dict):
+    """
+    `str.translate` table that classifies each codepoint on first lookup.
+    
+    A kept codepoint maps to itself, a removed one to the replacement text (None
+    deletes it). Results are cached in the dict, so every codepoint is classified
+    once per table and later lookups stay in C.
+    """
+    
+    def __init__(self, keep: Callable[[int], bool], replacement: Optional[str]):
+        super().__init__()
+        self._keep = keep
+        self._replacement = replacement
+    
+    def __missing__(self, codepoint: int) -> Union[int, str, None]:
+        value = codepoint if self._keep(codepoint) else self._replacement
+        self[codepoint] = value
+        return value
+
+
+@functools.lru_cache(maxsize=None)
+def _build_translation_table(strict_ascii: bool, preserve_whitespace: bool, replacement_text: str) -> _TranslationTable:
+    """
+    Build the translation table for one configuration, shared by all instances.
+    
+    Args:
+        strict_ascii: Only allow ASCII printable characters
+        preserve_whitespace: Keep space, tab, newline
+        replacement_text: Text to replace non-printable chars with
+        
+    Returns:
+        Lazily filled translation table
+    """
+    if strict_ascii:
+        allowed = _ASCII_PRINTABLE | _PRESERVED_WHITESPACE if preserve_whitespace else _ASCII_PRINTABLE
+        keep = allowed.__contains__
+    else:
+        keep = functools.partial(_is_printable_codepoint, preserve_whitespace=preserve_whitespace)
+    return _TranslationTable(keep, replacement_text or None)
+
+
 @register_operator("remove_non_printable")
 class RemoveNonPrintableMicroops(OperatorABC):
     """
@@ -65,42 +190,46 @@ class RemoveNonPrintableMicroops(OperatorABC):
             'processing_errors': 0
         }
         
+        # Per-codepoint action table of `run_batch`, created on first use
+        self._codepoint_actions = None
+        
         xlogger.info(f"Initialized {self.__class__.__name__} with config: {self.config}")
     
+    def _on_configure(self) -> None:
+        """Rebuild the patterns and tables derived from the configuration after `configure()`."""
+        self._compile_patterns()
+        self._codepoint_actions = None
+    
     def _compile_patterns(self):
         """Compile regex patterns for non-printable character detection."""
-        # Control characters (0x00-0x1F, 0x7F-0x9F)
-        self.control_chars_pattern = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]')
-        
-        # Byte Order Mark (BOM)
-        if self.config['remove_bom']:
-            self.bom_pattern = re.compile(r'[\uFEFF\uFFFE\u0000FEFF\u0000FFFE]')
-        else:
-            self.bom_pattern = None
-        
-        # Zero-width characters
-        if not self.config['preserve_zero_width']:
-            self.zero_width_pattern = re.compile(r'[\u200B-\u200F\u2028-\u202E\u2060-\u2064\u206A-\u206F]')
-        else:
-            self.zero_width_pattern = None
+        # Control, BOM and zero-width characters in one character-class alternation
+        self.non_printable_pattern = _build_non_printable_pattern(
+            bool(self.config['remove_bom']),
+            bool(self.config['preserve_zero_width'])
+        )
         
         # Preserved whitespace if configured
         if self.config['preserve_whitespace']:
-            self.preserve_chars = {'\t', '\n', '\r', ' '}
+            self.preserve_chars = frozenset(map(chr, _PRESERVED_WHITESPACE))
         else:
-            self.preserve_chars = set()
+            self.preserve_chars = frozenset()
         
         # ASCII printable range for strict mode
         if self.config['strict_ascii']:
             # ASCII printable: 0x20-0x7E plus preserved whitespace
-            ascii_printable = set(chr(i) for i in range(0x20, 0x7F))
-            ascii_printable.update(self.preserve_chars)
-            self.allowed_chars = ascii_printable
+            self.allowed_chars = frozenset(map(chr, _ASCII_PRINTABLE)) | self.preserve_chars
         else:
             self.allowed_chars = None
         
+        # Translation table for the printable filtering (strict ASCII or Unicode categories)
+        self.translation_table = _build_translation_table(
+            bool(self.config['strict_ascii']),
+            bool(self.config['preserve_whitespace']),
+            self.config['replacement_text']
+        )
+        
         # Whitespace normalization
-        self.whitespace_pattern = re.compile(r'\s+')
+        self.whitespace_pattern = _WHITESPACE_PATTERN
     
     @staticmethod
     def get_desc(lang: str = "zh") -> str:
@@ -125,12 +254,85 @@ class RemoveNonPrintableMicroops(OperatorABC):
         if not input_string or not isinstance(input_string, str):
             return input_string or ""
         
-        return self.error_handler.execute_with_retry(
-            func=self._remove_non_printable,
-            args=(input_string,),
-            max_retries=2,
-            operation_name="Non-printable characters removal"
-        )
+        return self._remove_non_printable(input_string)
+    
+    def run_batch(self, texts: Sequence[Optional[str]]) -> List[str]:
+        """
+        Remove non-printable characters from a batch of texts.
+        
+        With the default empty replacement text every step only deletes characters,
+        so the whole batch is filtered at once: its codepoints are looked up in a
+        per-codepoint action table with NumPy and the kept ones decoded in one pass.
+        The whitespace cleanup then runs once over the batch, inside Arrow's compute
+        kernels when pyarrow is installed. Falls back to processing text by text with
+        a non-empty replacement text or when NumPy is not installed.
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            Cleaned texts, in input order (empty or None entries become '', as in `run`)
+        """
+        results = [text or "" for text in texts]
+        indices = [i for i, text in enumerate(texts) if text and isinstance(text, str)]
+        
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        if np is None or self.config['replacement_text']:
+            for i in indices:
+                results[i] = self._remove_non_printable(texts[i])
+            return results
+        if not indices:
+            return results
+        
+        batch = [texts[i] for i in indices]
+        codepoints = np.frombuffer(''.join(batch).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        
+        # Classify the codepoints not seen before, once each
+        if self._codepoint_actions is None:
+            self._codepoint_actions = np.full(_NUM_CODEPOINTS, _UNCLASSIFIED, dtype=np.uint8)
+        actions = self._codepoint_actions[codepoints]
+        unclassified = actions == _UNCLASSIFIED
+        if unclassified.any():
+            for codepoint in np.unique(codepoints[unclassified]).tolist():
+                self._codepoint_actions[codepoint] = self._classify_codepoint(codepoint)
+            actions = self._codepoint_actions[codepoints]
+        
+        # Same counts as `_remove_non_printable`
+        counts = np.bincount(actions, minlength=_FILTER + 1)
+        self.stats['control_chars_removed'] += int(counts[_CONTROL])
+        self.stats['non_printable_removed'] += int(counts[_DELETE] + counts[_FILTER])
+        
+        # Decode the kept codepoints once, then cut them back into texts
+        keep = actions == _KEEP
+        kept_text = codepoints[keep].tobytes().decode('utf-32-le', 'surrogatepass')
+        kept_ends = np.cumsum(keep)[np.cumsum([len(text) for text in batch]) - 1].tolist()
+        filtered = []
+        start = 0
+        for end in kept_ends:
+            filtered.append(kept_text[start:end])
+            start = end
+        
+        for i, text in zip(indices, collapse_whitespace_batch(filtered)):
+            results[i] = text
+        return results
+    
+    def _classify_codepoint(self, codepoint: int) -> int:
+        """
+        Get the `run_batch` action of a codepoint, in the order `_remove_non_printable` checks it.
+        
+        Args:
+            codepoint: Codepoint to classify
+            
+        Returns:
+            One of _KEEP, _CONTROL, _DELETE, _FILTER
+        """
+        match = self.non_printable_pattern.fullmatch(chr(codepoint))
+        if match:
+            return _CONTROL if match.lastgroup == 'control' else _DELETE
+        return _KEEP if self.translation_table[codepoint] == codepoint else _FILTER
     
     def _remove_non_printable(self, text: str) -> str:
         """
@@ -145,43 +347,35 @@ class RemoveNonPrintableMicroops(OperatorABC):
         try:
             original_text = text
             
-            # 1. Remove BOM if configured
-            if self.bom_pattern:
-                bom_count = len(self.bom_pattern.findall(text))
-                text = self.bom_pattern.sub('', text)
-                self.stats['non_printable_removed'] += bom_count
+            # 1. Remove BOM if configured, 2. replace control characters and
+            # 3. remove zero-width characters if configured, all in a single pass
+            replacement = self.config['replacement_text']
+            control_count = 0
             
-            # 2. Remove control characters
-            control_count = len(self.control_chars_pattern.findall(text))
-            text = self.control_chars_pattern.sub(self.config['replacement_text'], text)
-            self.stats['control_chars_removed'] += control_count
+            def replace_char(match: re.Match) -> str:
+                nonlocal control_count
+                if match.lastgroup == 'control':
+                    control_count += 1
+                    return replacement
+                return ''
             
-            # 3. Remove zero-width characters if configured
-            if self.zero_width_pattern:
-                zw_count = len(self.zero_width_pattern.findall(text))
-                text = self.zero_width_pattern.sub('', text)
-                self.stats['non_printable_removed'] += zw_count
+            text, match_count = self.non_printable_pattern.subn(replace_char, text)
+            self.stats['control_chars_removed'] += control_count
+            self.stats['non_printable_removed'] += match_count - control_count
             
-            # 4. Strict ASCII mode - remove all non-ASCII printable
-            if self.allowed_chars:
-                filtered_chars = []
-                for char in text:
-                    if char in self.allowed_chars:
-                        filtered_chars.append(char)
-                    else:
-                        filtered_chars.append(self.config['replacement_text'])
-                        self.stats['non_printable_removed'] += 1
-                text = ''.join(filtered_chars)
+            # 4. Strict ASCII mode keeps only ASCII printable characters, otherwise
+            # 5. Unicode category-based filtering; both run in C via the translation table
+            filtered_text = text.translate(self.translation_table)
+            if len(replacement) == 1:
+                removed_count = filtered_text.count(replacement)
+                if self.translation_table[ord(replacement)] == ord(replacement):
+                    # Replacement chars already in the text are kept, not replaced
+                    removed_count -= text.count(replacement)
             else:
-                # 5. Unicode category-based filtering
-                filtered_chars = []
-                for char in text:
-                    if self._is_printable_unicode(char):
-                        filtered_chars.append(char)
-                    else:
-                        filtered_chars.append(self.config['replacement_text'])
-                        self.stats['non_printable_removed'] += 1
-                text = ''.join(filtered_chars)
+                # Each removed char changes the length by len(replacement) - 1
+                removed_count = (len(filtered_text) - len(text)) // (len(replacement) - 1)
+            text = filtered_text
+            self.stats['non_printable_removed'] += removed_count
             
             # 6. Clean up extra whitespace
             text = self.whitespace_pattern.sub(' ', text)
@@ -209,37 +403,7 @@ class RemoveNonPrintableMicroops(OperatorABC):
         Returns:
             True if character is printable, False otherwise
         """
-        # Always preserve configured whitespace
-        if char in self.preserve_chars:
-            return True
-        
-        # Get Unicode category
-        category = unicodedata.category(char)
-        
-        # Categories to preserve:
-        # L* - Letters
-        # N* - Numbers  
-        # P* - Punctuation (except some control-like)
-        # S* - Symbols (except some private use)
-        # Zs - Space separators (if preserving whitespace)
-        
-        if category.startswith(('L', 'N')):  # Letters and Numbers
-            return True
-        
-        if category.startswith('P'):  # Punctuation
-            # Exclude some problematic punctuation categories
-            if category in ('Pc', 'Pd', 'Pe', 'Pf', 'Pi', 'Po', 'Ps'):
-                return True
-        
-        if category.startswith('S'):  # Symbols
-            # Exclude private use and some control symbols
-            if category in ('Sc', 'Sk', 'Sm', 'So'):
-                return True
-        
-        if category == 'Zs' and self.config['preserve_whitespace']:  # Space separators
-            return True
-        
-        return False
+        return _is_printable_codepoint(ord(char), self.config['preserve_whitespace'])
     
     def get_stats(self) -> Dict[str, Any]:
         """Get processing statistics."""
@@ -8,10 +8,41 @@ import re
 from typing import Dict, Any, Optional
 
 from xpertcorpus.utils import xlogger
-from xpertcorpus.utils.xerror_handler import XErrorHandler, XRetryMechanism
+from xpertcorpus.utils.xerror_handler import XErrorHandler
 from xpertcorpus.modules.others.xoperator import OperatorABC, register_operator
 
 
+# Matches texts with at least 7 digits, the fewest a phone number can have (see `_should_remove_phone`)
+_MIN_DIGITS_PATTERN = re.compile(r'(?:\D*\d){7}')
+
+# Non-digit characters, stripped to validate a phone number
+_NON_DIGIT_PATTERN = re.compile(r'\D')
+
+# International format with country code
+_INTL_PATTERN = re.compile(
+    r'\b(?:\+|00)?[1-9]\d{0,3}[-.\s]?(?:\(\d{1,4}\)[-.\s]?)?\d{1,4}[-.\s]?\d{1,4}[-.\s]?\d{1,9}\b'
+)
+
+# US/North American format
+_US_PATTERN = re.compile(
+    r'\b(?:1[-.\s]?)?(?:\(\d{3}\)|\d{3})[-.\s]?\d{3}[-.\s]?\d{4}(?:\s?ext\.?\s?\d{1,5})?\b'
+)
+
+# General phone number pattern (more flexible)
+_GENERAL_PATTERN = re.compile(
+    r'\b(?:(?:\+|00)?[1-9]\d{0,3}[-.\s]?)?(?:\(?\d{2,4}\)?[-.\s]?)?\d{2,4}[-.\s]?\d{2,4}[-.\s]?\d{2,9}\b'
+)
+
+# Pattern for phone numbers with common prefixes
+_PREFIX_PATTERN = re.compile(
+    r'\b(?:phone|tel|call|mobile|cell|fax):\s*(?:\+|00)?[1-9][\d\-.\s\(\)]{7,20}\b',
+    re.IGNORECASE
+)
+
+# Whitespace normalization
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
 @register_operator("remove_phone_numbers")
 class RemovePhoneNumbersMicroops(OperatorABC):
     """
@@ -35,6 +66,8 @@ class RemovePhoneNumbersMicroops(OperatorABC):
                 - mask_instead_remove: Replace with masked format (default: False)
                 - country_codes: List of country codes to specifically target (default: [])
                 - preserve_extensions: Keep extension numbers (default: False)
+                - strip_on_passthrough: Strip texts without phone numbers; other whitespace
+                  is only normalized where a phone number was replaced (default: False)
         """
         super().__init__(config)
         self.error_handler = XErrorHandler()
@@ -44,7 +77,8 @@ class RemovePhoneNumbersMicroops(OperatorABC):
             'replacement_text': '',
             'mask_instead_remove': False,
             'country_codes': [],
-            'preserve_extensions': False
+            'preserve_extensions': False,
+            'strip_on_passthrough': False
         }
         
         # Merge with provided config
@@ -66,29 +100,12 @@ class RemovePhoneNumbersMicroops(OperatorABC):
     
     def _compile_patterns(self):
         """Compile regex patterns for phone number detection."""
-        # International format with country code
-        self.intl_pattern = re.compile(
-            r'\b(?:\+|00)?[1-9]\d{0,3}[-.\s]?(?:\(\d{1,4}\)[-.\s]?)?\d{1,4}[-.\s]?\d{1,4}[-.\s]?\d{1,9}\b'
-        )
-        
-        # US/North American format
-        self.us_pattern = re.compile(
-            r'\b(?:1[-.\s]?)?(?:\(\d{3}\)|\d{3})[-.\s]?\d{3}[-.\s]?\d{4}(?:\s?ext\.?\s?\d{1,5})?\b'
-        )
-        
-        # General phone number pattern (more flexible)
-        self.general_pattern = re.compile(
-            r'\b(?:(?:\+|00)?[1-9]\d{0,3}[-.\s]?)?(?:\(?\d{2,4}\)?[-.\s]?)?\d{2,4}[-.\s]?\d{2,4}[-.\s]?\d{2,9}\b'
-        )
-        
-        # Pattern for phone numbers with common prefixes
-        self.prefix_pattern = re.compile(
-            r'\b(?:phone|tel|call|mobile|cell|fax):\s*(?:\+|00)?[1-9][\d\-.\s\(\)]{7,20}\b',
-            re.IGNORECASE
-        )
-        
-        # Whitespace normalization
-        self.whitespace_pattern = re.compile(r'\s+')
+        # Patterns shared by all configurations
+        self.intl_pattern = _INTL_PATTERN
+        self.us_pattern = _US_PATTERN
+        self.general_pattern = _GENERAL_PATTERN
+        self.prefix_pattern = _PREFIX_PATTERN
+        self.whitespace_pattern = _WHITESPACE_PATTERN
     
     @staticmethod
     def get_desc(lang: str = "zh") -> str:
@@ -113,12 +130,7 @@ class RemovePhoneNumbersMicroops(OperatorABC):
         if not input_string or not isinstance(input_string, str):
             return input_string or ""
         
-        return self.error_handler.execute_with_retry(
-            func=self._remove_phone_numbers,
-            args=(input_string,),
-            max_retries=2,
-            operation_name="Phone number removal"
-        )
+        return self._remove_phone_numbers(input_string)
     
     def _remove_phone_numbers(self, text: str) -> str:
         """
@@ -133,6 +145,11 @@ class RemovePhoneNumbersMicroops(OperatorABC):
         try:
             original_text = text
             
+            # Texts with too few digits cannot contain a phone number to replace
+            if not _MIN_DIGITS_PATTERN.match(text):
+                return text.strip() if self.config['strip_on_passthrough'] else text
+            processed_before = self.stats['phone_numbers_removed'] + self.stats['phone_numbers_masked']
+            
             def replace_phone(match):
                 phone = match.group(0)
                 
@@ -153,12 +170,16 @@ class RemovePhoneNumbersMicroops(OperatorABC):
             text = self.intl_pattern.sub(replace_phone, text)
             text = self.general_pattern.sub(replace_phone, text)
             
+            # Texts without phone numbers are passed through without another scan
+            total_processed = self.stats['phone_numbers_removed'] + self.stats['phone_numbers_masked']
+            if total_processed == processed_before:
+                return text.strip() if self.config['strip_on_passthrough'] else text
+            
             # Clean up extra whitespace
             text = self.whitespace_pattern.sub(' ', text)
             text = text.strip()
             
             # Log statistics periodically
-            total_processed = self.stats['phone_numbers_removed'] + self.stats['phone_numbers_masked']
             if total_processed % 500 == 0 and total_processed > 0:
                 xlogger.debug(f"Phone number processing stats: {self.stats}")
             
@@ -180,7 +201,7 @@ class RemovePhoneNumbersMicroops(OperatorABC):
             True if phone should be removed, False otherwise
         """
         # Extract digits only for validation
-        digits = re.sub(r'\D', '', phone)
+        digits = _NON_DIGIT_PATTERN.sub('', phone)
         
         # Basic validation - too short or too long probably not a phone number
         if len(digits) < 7 or len(digits) > 15:
@@ -210,7 +231,7 @@ class RemovePhoneNumbersMicroops(OperatorABC):
             # Preserve original format structure
             masked = ""
             digits_count = 0
-            total_digits = len(re.sub(r'\D', '', phone))
+            total_digits = len(_NON_DIGIT_PATTERN.sub('', phone))
             
             for char in phone:
                 if char.isdigit():
@@ -9,7 +9,7 @@ import string
 from typing import Dict, Any, Optional, Set
 
 from xpertcorpus.utils import xlogger
-from xpertcorpus.utils.xerror_handler import XErrorHandler, XRetryMechanism
+from xpertcorpus.utils.xerror_handler import XErrorHandler
 from xpertcorpus.modules.others.xoperator import OperatorABC, register_operator
 
 
@@ -150,12 +150,7 @@ class RemoveSpecialCharsMicroops(OperatorABC):
         if not input_string or not isinstance(input_string, str):
             return input_string or ""
         
-        return self.error_handler.execute_with_retry(
-            func=self._remove_special_chars,
-            args=(input_string,),
-            max_retries=2,
-            operation_name="Special characters removal"
-        )
+        return self._remove_special_chars(input_string)
     
     def _remove_special_chars(self, text: str) -> str:
         """
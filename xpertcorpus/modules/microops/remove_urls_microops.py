@@ -9,7 +9,7 @@ from typing import Dict, Any, Optional, List, Tuple
 from urllib.parse import urlparse
 
 from xpertcorpus.utils import xlogger
-from xpertcorpus.utils.xerror_handler import XErrorHandler, XRetryMechanism
+from xpertcorpus.utils.xerror_handler import XErrorHandler
 from xpertcorpus.modules.others.xoperator import OperatorABC, register_operator
 
 
@@ -146,12 +146,7 @@ class RemoveURLsMicroops(OperatorABC):
         if not input_string or not isinstance(input_string, str):
             return input_string or ""
         
-        return self.error_handler.execute_with_retry(
-            func=self._remove_urls,
-            args=(input_string,),
-            max_retries=2,
-            operation_name="URL removal"
-        )
+        return self._remove_urls(input_string)
     
     def _remove_urls(self, text: str) -> str:
         """
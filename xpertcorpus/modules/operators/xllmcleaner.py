@@ -4,6 +4,8 @@ This script is the pipeline of generating pretraining data.
 @author: rookielittleblack
 @date:   2025-08-11
 """
+import logging
+
 from xpertcorpus.utils import xlogger, count_tokens, XpertCorpusStorage
 from concurrent.futures import ThreadPoolExecutor
 from xpertcorpus.modules.others.xapi import XApi
@@ -51,48 +53,52 @@ class XLlmCleaner(OperatorABC):
             dataframe = dataframe.head(self.limit)
             xlogger.info(f"Limit is set, number of rows after limit applied: {len(dataframe)}")
 
-        # Create a list to hold all generated questions and answers
-        llm_inputs = []
-
         # Prepare LLM inputs by formatting the prompt with raw content from the dataframe
         items = list(dataframe.iterrows())
 
+        # The prompt token count is only logged, so skip tokenizing every prompt unless DEBUG is on
+        debug_enabled = xlogger.logger.isEnabledFor(logging.DEBUG)
+
         def build_prompt(row):
             """
             Build the LLM input prompt for a single row.
             This function extracts the raw content, formats it using the prompt template,
-            counts the tokens, and returns the prompt string.
+            and returns the prompt string (logging its token count at DEBUG level).
             If the raw content is empty, returns None.
             """
             raw_content = row[1].get(self.input_key, '')
             if raw_content:
                 llm_input = self.prompts.get_prompt(raw_content)
-                llm_input_tokens = count_tokens(llm_input)
-                xlogger.debug(f"Calculated LLM input token count: {llm_input_tokens}")
+                if debug_enabled:
+                    xlogger.debug(f"Calculated LLM input token count: {count_tokens(llm_input)}")
                 return llm_input
             return None
 
         # Use ThreadPoolExecutor to parallelize prompt construction.
         # Note: For CPU-bound tasks, consider using ProcessPoolExecutor for better performance.
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            llm_inputs = list(executor.map(build_prompt, items))
-        # Filter out None results (rows with empty raw_content)
-        llm_inputs = [x for x in llm_inputs if x]
-
-        # Generate the text using the model
+            row_prompts = list(executor.map(build_prompt, items))
+        # Keep the row position of every non-empty prompt so results map back to their rows
+        prompt_rows = [pos for pos, prompt in enumerate(row_prompts) if prompt]
+        llm_inputs = [row_prompts[pos] for pos in prompt_rows]
+
+        # Generate the text using the model; token counting of each response overlaps
+        # with the requests still in flight instead of running after all of them finish
+        generated_outputs = [None] * len(dataframe)
+        output_tokens = [0] * len(dataframe)
         try:
             xlogger.info("Generating text using the model...")
-            generated_outputs = self.xapi.generate_from_input(llm_inputs)
+            for idx, output in self.xapi.generate_stream(llm_inputs):
+                pos = prompt_rows[idx]
+                generated_outputs[pos] = output
+                output_tokens[pos] = count_tokens(output) if output else 0
             xlogger.info("Text generation completed.")
         except Exception as e:
             xlogger.error(f"Error during text generation: {e}")
             return
 
-        # Add the generated content back to the dataframe
+        # Add the generated content and its token count back to the dataframe
         dataframe[self.output_key] = generated_outputs
-
-        # Add the token count to the dataframe
-        output_tokens = [count_tokens(x) for x in generated_outputs]
         dataframe[self.output_key + '_tokens'] = output_tokens
 
         # Calculate tokens change
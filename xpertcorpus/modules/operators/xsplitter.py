@@ -4,6 +4,7 @@ This operator is used to split text into chunks.
 @author: rookielittleblack
 @date:   2025-08-11
 """
+import re
 import pandas as pd
 
 from chonkie import (
@@ -12,16 +13,24 @@ from chonkie import (
     SemanticChunker,
     RecursiveChunker
 )
-from xpertcorpus.utils import xlogger, xtokenizer, count_tokens, XpertCorpusStorage
-from langchain.text_splitter import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
+from typing import List
+from xpertcorpus.utils import xlogger, xtokenizer, count_tokens_cached, count_tokens_batch, XpertCorpusStorage
+from langchain.text_splitter import MarkdownHeaderTextSplitter
 from xpertcorpus.modules.others.xoperator import OperatorABC, register_operator
 
 
 class LangchainMarkdownSplitter:
     """
     A text splitter for markdown files that uses langchain to split by headers
-    and then recursively by characters, ensuring semantic completeness.
+    and then packs oversized sections by paragraph/line/sentence boundaries,
+    ensuring semantic completeness.
     """
+    # Section boundaries, found in a single pass: paragraphs, lines, then sentence ends
+    # (CJK text puts no space after its terminators, so they end a sentence on their own)
+    SEPARATOR_PATTERN = re.compile(r'\n{2,}|\n|(?<=[。！？])|(?<=[.?!])[ \t]+')
+    # Fallback boundaries for a single segment that alone exceeds chunk_size
+    WORD_PATTERN = re.compile(r'\S+\s*')
+
     def __init__(self, chunk_size: int, chunk_overlap: int, min_tokens_per_chunk: int):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
@@ -34,12 +43,73 @@ class LangchainMarkdownSplitter:
             ("####", "H4"),
         ]
         self.markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on, return_each_line=False)
-        
-        self.recursive_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=count_tokens,
-        )
+
+    @staticmethod
+    def _split_segments(text: str, pattern: re.Pattern) -> List[str]:
+        """Cut text after every pattern match; the segments concatenate back to text."""
+        segments = []
+        start = 0
+        for match in pattern.finditer(text):
+            if match.end() > start:
+                segments.append(text[start:match.end()])
+                start = match.end()
+        if start < len(text):
+            segments.append(text[start:])
+        return segments
+
+    def _split_by_tokens(self, text: str) -> List[str]:
+        """Cut text before every chunk_size-th token, for a piece without any boundary left."""
+        offsets = xtokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        cuts = [0]
+        for start, _ in offsets[self.chunk_size::self.chunk_size]:
+            # Tokens inside one multi-byte character share its start; never cut twice there
+            if start > cuts[-1]:
+                cuts.append(start)
+        cuts.append(len(text))
+        return [text[start:end] for start, end in zip(cuts, cuts[1:])]
+
+    def _split_long_text(self, text: str) -> List[str]:
+        """
+        Split an oversized section into chunks of at most chunk_size tokens.
+
+        Separator offsets are collected once and the resulting segments are
+        tokenized in one batch, then greedily packed into chunks in a single
+        forward pass, carrying up to chunk_overlap tokens into the next chunk.
+        Segments over chunk_size are cut at word boundaries, and words still over
+        it (e.g. unspaced text) at every chunk_size-th token.
+        """
+        segments = self._split_segments(text, self.SEPARATOR_PATTERN)
+        pieces, piece_tokens = [], []
+        for segment, tokens in zip(segments, count_tokens_batch(segments)):
+            if tokens > self.chunk_size:
+                words = self._split_segments(segment, self.WORD_PATTERN)
+                for word, word_tokens in zip(words, count_tokens_batch(words)):
+                    if word_tokens > self.chunk_size:
+                        parts = self._split_by_tokens(word)
+                        pieces.extend(parts)
+                        piece_tokens.extend(count_tokens_batch(parts))
+                    else:
+                        pieces.append(word)
+                        piece_tokens.append(word_tokens)
+            else:
+                pieces.append(segment)
+                piece_tokens.append(tokens)
+
+        chunks = []
+        window_start, window_tokens = 0, 0
+        for i, tokens in enumerate(piece_tokens):
+            if window_tokens + tokens > self.chunk_size and i > window_start:
+                chunks.append("".join(pieces[window_start:i]))
+                # Keep the trailing pieces that fit into the overlap budget
+                while window_start < i and (
+                    window_tokens > self.chunk_overlap or window_tokens + tokens > self.chunk_size
+                ):
+                    window_tokens -= piece_tokens[window_start]
+                    window_start += 1
+            window_tokens += tokens
+        if window_start < len(pieces):
+            chunks.append("".join(pieces[window_start:]))
+        return chunks
 
     def __call__(self, text: str):
         class SimpleChunk:
@@ -60,16 +130,17 @@ class LangchainMarkdownSplitter:
 
             content_with_header = header_str + doc.page_content.strip()
             
-            if count_tokens(content_with_header) > self.chunk_size:
-                # Content is too long, split it recursively
-                splits = self.recursive_splitter.split_text(doc.page_content)
-                for split in splits:
-                    chunk_text = header_str + split.strip()
-                    if count_tokens(chunk_text) >= self.min_tokens_per_chunk:
+            content_tokens = count_tokens_cached(content_with_header)
+            if content_tokens > self.chunk_size:
+                # Content is too long, split it by separator boundaries
+                splits = self._split_long_text(doc.page_content)
+                chunk_texts = [header_str + split.strip() for split in splits]
+                for chunk_text, chunk_tokens in zip(chunk_texts, count_tokens_batch(chunk_texts)):
+                    if chunk_tokens >= self.min_tokens_per_chunk:
                         final_chunks.append(SimpleChunk(chunk_text))
             else:
                 # Content is short enough
-                if count_tokens(content_with_header) >= self.min_tokens_per_chunk:
+                if content_tokens >= self.min_tokens_per_chunk:
                     final_chunks.append(SimpleChunk(content_with_header))
         return final_chunks
 
@@ -152,7 +223,7 @@ class XTextSplitter(OperatorABC):
     def _split_text(self, text: str):
         """Split the text into chunks"""
         # Calculate total tokens and max tokens
-        total_tokens = count_tokens(text)
+        total_tokens = count_tokens_cached(text)
         max_tokens = self.tokenizer.model_max_length
         xlogger.info(f"max_tokens: {max_tokens}")
 
@@ -210,6 +281,7 @@ class XTextSplitter(OperatorABC):
         for index, row in dataframe.iterrows():
             text = row[self.input_key]
             chunks = self._split_text(text)
+            text_tokens = count_tokens_cached(text)
 
             # Iterate over the chunks and generate new dataframe data for each chunk
             for chunk_index, chunk in enumerate(chunks):
@@ -217,8 +289,9 @@ class XTextSplitter(OperatorABC):
                 new_item[f"{self.output_key}_last_step_index"] = index
                 new_item[f"{self.output_key}_last_step_chunk_index"] = chunk_index
                 new_item[self.output_key] = chunk.text
-                new_item[f"{self.output_key}_tokens"] = count_tokens(chunk.text)
-                new_item[f"{self.output_key}_tokens_changed"] = count_tokens(chunk.text) - count_tokens(text)
+                chunk_tokens = count_tokens_cached(chunk.text)
+                new_item[f"{self.output_key}_tokens"] = chunk_tokens
+                new_item[f"{self.output_key}_tokens_changed"] = chunk_tokens - text_tokens
                 new_dataframe = pd.concat([new_dataframe, pd.DataFrame([new_item])], ignore_index=True)
 
         # Save the new dataframe to the output file
@@ -6,13 +6,13 @@ XXXXXX
 """
 import re
 import os
-import json
+import orjson
 import requests
 import threading
 
 from abc import ABC, abstractmethod
 from tqdm import tqdm
-from typing import Any, List
+from typing import Any, Iterator, List, Optional, Tuple
 from xpertcorpus.utils import xlogger, XConfigLoader
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -158,78 +158,82 @@ class XApi(ApiABC):
             # If content is empty (PS: This can be happen when disable thinking for models like Qwen3-32B), just return reasoning_content.
             return reasoning_content
 
-    def generate_from_input(self, user_inputs: list[str], system_prompt: str = "You are a helpful assistant") -> list[str]:
-        def api_chat_with_id(system_info: str, messages: str, model: str, id):
-            try:
-                # Construct payload_dict
-                payload_dict = {
-                    "model": model,
-                    "messages": [
-                        {"role": "system", "content": system_info},
-                        {"role": "user", "content": messages}
-                    ],
-                    "temperature": self.temperature
-                }
-
-                # Add chat_template_kwargs to the payload_dict if enable_thinking is 'true' or 'false'
-                if self.enable_thinking == "true":
-                    payload_dict["chat_template_kwargs"] = {"enable_thinking": True}
-                    self.logger.info(f"===> enable_thinking is 'true', add chat_template_kwargs to the payload_dict")
-                elif self.enable_thinking == "false":
-                    payload_dict["chat_template_kwargs"] = {"enable_thinking": False}
-                    self.logger.info(f"===> enable_thinking is 'false', add chat_template_kwargs to the payload_dict")
-                else:
-                    # DONOT add chat_template_kwargs
-                    pass
-
-                # Add top_p and top_k to the payload_dict if they are not 999999
-                if self.top_p != 999999:
-                    payload_dict["top_p"] = self.top_p
-                if self.top_k != 999999:
-                    payload_dict["top_k"] = self.top_k
-
-                # Serialize the payload_dict to JSON
-                payload = json.dumps(payload_dict)
-                #self.logger.info(f"===> payload: `{payload}`")
-
-                # Set headers
-                headers = {
-                    'Authorization': f"Bearer {self.api_key}",
-                    'Content-Type': 'application/json',
-                    #'User-Agent': 'Apifox/1.0.0 (https://apifox.com)'
-                }
-
-                # Make a POST request to the API
-                response = requests.post(self.api_url, headers=headers, data=payload, timeout=1800)
-                # self.logger.debug(f"===> 1 self.api_url: {self.api_url}, self.model_name: {self.model_name}")
-                # self.logger.debug(f"===> 1 payload: {payload}")
-                # self.logger.debug(f"===> 1 response.status_code: {response.status_code}")
-                # self.logger.debug(f"===> 1 response.content: {response.content}")
-                
-                # Check if the response is successful
-                if response.status_code == 200:
-                    # self.logger.info(f"API request successful")
-                    response_data = response.json()
-                    # Track token usage for this request
-                    self.update_token_counts(response_data)
-                    # self.logger.info(f"API response: {response_data['choices'][0]['message']['content']}")
-                    return id, self.format_response(response_data)
-                else:
-                    self.logger.error(f"API request failed with status {response.status_code}: {response.text}")
-                    return id, None
-            except Exception as e:
-                self.logger.error(f"API request error: {e}")
+    def _api_chat_with_id(self, system_info: str, messages: str, model: str, id):
+        """Send one chat request; returns (id, formatted response or None on failure)."""
+        try:
+            # Construct payload_dict
+            payload_dict = {
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": system_info},
+                    {"role": "user", "content": messages}
+                ],
+                "temperature": self.temperature
+            }
+
+            # Add chat_template_kwargs to the payload_dict if enable_thinking is 'true' or 'false'
+            if self.enable_thinking == "true":
+                payload_dict["chat_template_kwargs"] = {"enable_thinking": True}
+                self.logger.info(f"===> enable_thinking is 'true', add chat_template_kwargs to the payload_dict")
+            elif self.enable_thinking == "false":
+                payload_dict["chat_template_kwargs"] = {"enable_thinking": False}
+                self.logger.info(f"===> enable_thinking is 'false', add chat_template_kwargs to the payload_dict")
+            else:
+                # DONOT add chat_template_kwargs
+                pass
+
+            # Add top_p and top_k to the payload_dict if they are not 999999
+            if self.top_p != 999999:
+                payload_dict["top_p"] = self.top_p
+            if self.top_k != 999999:
+                payload_dict["top_k"] = self.top_k
+
+            # Serialize the payload_dict to JSON (UTF-8 bytes, no \uXXXX escaping of non-ASCII text)
+            payload = orjson.dumps(payload_dict)
+            #self.logger.info(f"===> payload: `{payload}`")
+
+            # Set headers
+            headers = {
+                'Authorization': f"Bearer {self.api_key}",
+                'Content-Type': 'application/json',
+                #'User-Agent': 'Apifox/1.0.0 (https://apifox.com)'
+            }
+
+            # Make a POST request to the API
+            response = requests.post(self.api_url, headers=headers, data=payload, timeout=1800)
+            # self.logger.debug(f"===> 1 self.api_url: {self.api_url}, self.model_name: {self.model_name}")
+            # self.logger.debug(f"===> 1 payload: {payload}")
+            # self.logger.debug(f"===> 1 response.status_code: {response.status_code}")
+            # self.logger.debug(f"===> 1 response.content: {response.content}")
+            
+            # Check if the response is successful
+            if response.status_code == 200:
+                # self.logger.info(f"API request successful")
+                response_data = orjson.loads(response.content)
+                # Track token usage for this request
+                self.update_token_counts(response_data)
+                # self.logger.info(f"API response: {response_data['choices'][0]['message']['content']}")
+                return id, self.format_response(response_data)
+            else:
+                self.logger.error(f"API request failed with status {response.status_code}: {response.text}")
                 return id, None
-                
-        responses = [None] * len(user_inputs)
-        # -- end of subfunction api_chat_with_id --
+        except Exception as e:
+            self.logger.error(f"API request error: {e}")
+            return id, None
+
+    def generate_stream(self, user_inputs: list[str], system_prompt: str = "You are a helpful assistant") -> Iterator[Tuple[int, Optional[str]]]:
+        """
+        Generate responses and yield each one as soon as its request completes,
+        so callers can post-process results while other requests are still in flight.
 
+        Yields:
+            Tuple of (index into user_inputs, response or None on failure), in completion order
+        """
         # Use ThreadPoolExecutor to parallelize the API calls.
-        # self.logger.info(f"Generating {len(questions)} responses")
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             futures = [
                 executor.submit(
-                    api_chat_with_id,
+                    self._api_chat_with_id,
                     system_info = system_prompt,
                     messages = question,
                     model = self.model_name,
@@ -237,8 +241,12 @@ class XApi(ApiABC):
                 ) for idx, question in enumerate(user_inputs)
             ]
             for future in tqdm(as_completed(futures), total=len(futures), desc="Generating......"):
-                    response = future.result() # (id, response)
-                    responses[response[0]] = response[1]
+                yield future.result()  # (id, response)
+
+    def generate_from_input(self, user_inputs: list[str], system_prompt: str = "You are a helpful assistant") -> list[str]:
+        responses = [None] * len(user_inputs)
+        for idx, response in self.generate_stream(user_inputs, system_prompt):
+            responses[idx] = response
                     
         #self.logger.info(f"Token usage summary: {self.get_token_counts()}")
         return responses
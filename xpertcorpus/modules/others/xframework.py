@@ -146,6 +146,7 @@ class FrameworkABC(ABC):
         self.max_workers = max_workers
         self.limit = limit
         self.config = config or {}
+        self.input_stat: Optional[os.stat_result] = None  # Set by _validate_paths
         
         # Framework state
         self.state = FrameworkState.INITIALIZED
@@ -234,8 +235,10 @@ class FrameworkABC(ABC):
     
     def _validate_paths(self) -> None:
         """Validate and prepare input/output paths."""
-        # Validate input path
-        if not os.path.exists(self.input_file):
+        # Validate input path (a single stat, kept for later file type checks)
+        try:
+            self.input_stat = os.stat(self.input_file)
+        except FileNotFoundError:
             raise FileNotFoundError(f"Input path not found: {self.input_file}")
         
         # Prepare output directory with timestamp if default
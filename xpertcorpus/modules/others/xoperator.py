@@ -53,6 +53,10 @@ class OperatorABC(ABC):
     lifecycle management, error handling, and configuration support.
     """
     
+    # Fixed attribute layout; subclasses declaring their own __slots__ get no
+    # per-instance __dict__, others get one as usual
+    __slots__ = ('config', 'state', 'metadata', 'metrics', '_hooks', '__weakref__')
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         Initialize operator with optional configuration.
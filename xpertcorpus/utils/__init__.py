@@ -7,7 +7,7 @@ configuration management, storage operations, error handling, and so on.
 @author: rookielittleblack
 @date:   2025-08-13
 """
-from .xutils import get_xtokenizer, count_tokens, xtokenizer
+from .xutils import get_xtokenizer, count_tokens, count_tokens_cached, count_tokens_batch, collapse_whitespace_batch, xtokenizer
 from .xlogger import xlogger
 from .xconfig import XConfigLoader
 from .xstorage import XpertCorpusStorage, FileStorage
@@ -39,6 +39,9 @@ __all__ = [
     'xtokenizer',
     'get_xtokenizer',
     'count_tokens',
+    'count_tokens_cached',
+    'count_tokens_batch',
+    'collapse_whitespace_batch',
     
     # Error handling
     'XErrorHandler',
@@ -79,15 +79,36 @@ class ErrorInfo:
 class XRetryMechanism:
     """
     Retry mechanism for handling transient failures.
-    Provides configurable retry strategies with exponential backoff.
+    Provides configurable retry strategies with capped exponential backoff and jitter.
     """
     
+    # Transient failures worth retrying (requests' connection/timeout errors are OSError subclasses)
+    RETRY_EXCEPTIONS: tuple = (
+        ConnectionError,
+        TimeoutError,
+        OSError,
+    )
+    
+    # Deterministic failures that fail again on retry, checked before RETRY_EXCEPTIONS
+    STOP_EXCEPTIONS: tuple = (
+        ValueError,
+        TypeError,
+        KeyError,
+        MemoryError,
+        FileNotFoundError,
+        PermissionError,
+        IsADirectoryError,
+        NotADirectoryError,
+    )
+    
     def __init__(self, 
                  max_retries: int = 3,
                  base_delay: float = 1.0,
                  max_delay: float = 60.0,
                  exponential_base: float = 2.0,
-                 jitter: bool = True):
+                 jitter: Union[bool, str] = "full",
+                 retry_exceptions: Optional[tuple] = None,
+                 stop_exceptions: Optional[tuple] = None):
         """
         Initialize retry mechanism.
         
@@ -96,13 +117,26 @@ class XRetryMechanism:
             base_delay: Base delay in seconds
             max_delay: Maximum delay in seconds
             exponential_base: Base for exponential backoff
-            jitter: Whether to add random jitter to prevent thundering herd
+            jitter: Random jitter to prevent thundering herd:
+                - "full" (or True): sleep uniformly in [0, capped delay]
+                - "equal": sleep half the capped delay plus uniform in [0, half]
+                - False: no jitter, sleep exactly the capped delay
+            retry_exceptions: Exception types to retry (default: RETRY_EXCEPTIONS)
+            stop_exceptions: Exception types that are never retried, even when they
+                also match retry_exceptions (default: STOP_EXCEPTIONS)
         """
+        if jitter is True:
+            jitter = "full"
+        if jitter not in (False, "full", "equal"):
+            raise ValueError(f"Unsupported jitter mode: {jitter}")
+        
         self.max_retries = max_retries
         self.base_delay = base_delay
         self.max_delay = max_delay
         self.exponential_base = exponential_base
         self.jitter = jitter
+        self.retry_exceptions = tuple(retry_exceptions) if retry_exceptions is not None else self.RETRY_EXCEPTIONS
+        self.stop_exceptions = tuple(stop_exceptions) if stop_exceptions is not None else self.STOP_EXCEPTIONS
         
     def calculate_delay(self, attempt: int) -> float:
         """Calculate delay for the given attempt number."""
@@ -110,10 +144,12 @@ class XRetryMechanism:
         
         delay = min(self.base_delay * (self.exponential_base ** attempt), self.max_delay)
         
-        if self.jitter:
-            # Add random jitter of ±25%
-            jitter_range = delay * 0.25
-            delay += random.uniform(-jitter_range, jitter_range)
+        if self.jitter == "full":
+            # Full jitter: spread retries of concurrent workers over the whole window
+            delay = random.uniform(0, delay)
+        elif self.jitter == "equal":
+            # Equal jitter: keep at least half of the backoff, randomize the rest
+            delay = delay / 2 + random.uniform(0, delay / 2)
             
         return max(0, delay)
     
@@ -130,23 +166,12 @@ class XRetryMechanism:
         """
         if attempt >= self.max_retries:
             return False
-            
-        # Define retryable exceptions
-        retryable_exceptions = (
-            ConnectionError,
-            TimeoutError,
-            OSError,
-            IOError,
-        )
         
-        # Add specific exceptions that are usually transient
-        import requests
-        if hasattr(requests, 'ConnectionError'):
-            retryable_exceptions = retryable_exceptions + (requests.ConnectionError,)
-        if hasattr(requests, 'Timeout'):
-            retryable_exceptions = retryable_exceptions + (requests.Timeout,)
+        # Unrecoverable errors short-circuit without any backoff
+        if isinstance(exception, self.stop_exceptions):
+            return False
             
-        return isinstance(exception, retryable_exceptions)
+        return isinstance(exception, self.retry_exceptions)
     
     def retry(self, func: Callable, *args, **kwargs) -> Any:
         """
@@ -185,7 +210,10 @@ class XRetryMechanism:
 def retry_on_failure(max_retries: int = 3, 
                     base_delay: float = 1.0,
                     max_delay: float = 60.0,
-                    exponential_base: float = 2.0):
+                    exponential_base: float = 2.0,
+                    jitter: Union[bool, str] = "full",
+                    retry_exceptions: Optional[tuple] = None,
+                    stop_exceptions: Optional[tuple] = None):
     """
     Decorator for automatic retry on function failures.
     
@@ -194,6 +222,9 @@ def retry_on_failure(max_retries: int = 3,
         base_delay: Base delay in seconds
         max_delay: Maximum delay in seconds
         exponential_base: Base for exponential backoff
+        jitter: Jitter mode ("full", "equal" or False), see XRetryMechanism
+        retry_exceptions: Exception types to retry, see XRetryMechanism
+        stop_exceptions: Exception types never retried, see XRetryMechanism
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
@@ -202,7 +233,10 @@ def retry_on_failure(max_retries: int = 3,
                 max_retries=max_retries,
                 base_delay=base_delay,
                 max_delay=max_delay,
-                exponential_base=exponential_base
+                exponential_base=exponential_base,
+                jitter=jitter,
+                retry_exceptions=retry_exceptions,
+                stop_exceptions=stop_exceptions
             )
             return retry_mechanism.retry(func, *args, **kwargs)
         return wrapper
@@ -467,6 +501,8 @@ class XErrorHandler:
                     *args,
                     fallback_value: Any = None,
                     retry_enabled: bool = False,
+                    retry_exceptions: Optional[tuple] = None,
+                    stop_exceptions: Optional[tuple] = None,
                     **kwargs) -> Any:
         """
         Safely execute a function with error handling.
@@ -476,6 +512,8 @@ class XErrorHandler:
             *args: Function arguments
             fallback_value: Value to return if execution fails
             retry_enabled: Whether to enable retry mechanism
+            retry_exceptions: Exception types to retry (default: XRetryMechanism.RETRY_EXCEPTIONS)
+            stop_exceptions: Exception types never retried (default: XRetryMechanism.STOP_EXCEPTIONS)
             **kwargs: Function keyword arguments
             
         Returns:
@@ -483,7 +521,13 @@ class XErrorHandler:
         """
         try:
             if retry_enabled:
-                return self.retry_mechanism.retry(func, *args, **kwargs)
+                retry_mechanism = self.retry_mechanism
+                if retry_exceptions is not None or stop_exceptions is not None:
+                    retry_mechanism = XRetryMechanism(
+                        retry_exceptions=retry_exceptions,
+                        stop_exceptions=stop_exceptions
+                    )
+                return retry_mechanism.retry(func, *args, **kwargs)
             else:
                 return func(*args, **kwargs)
         except Exception as e:
@@ -501,7 +545,9 @@ class XErrorHandler:
 
 def safe_execute(func: Optional[Callable] = None, 
                 fallback_value: Any = None,
-                retry_enabled: bool = False):
+                retry_enabled: bool = False,
+                retry_exceptions: Optional[tuple] = None,
+                stop_exceptions: Optional[tuple] = None):
     """
     Decorator for safe function execution with error handling.
     
@@ -509,6 +555,8 @@ def safe_execute(func: Optional[Callable] = None,
         func: Function to decorate (for direct decoration)
         fallback_value: Value to return on error
         retry_enabled: Whether to enable retry mechanism
+        retry_exceptions: Exception types to retry, see XRetryMechanism
+        stop_exceptions: Exception types never retried, see XRetryMechanism
     """
     def decorator(f: Callable) -> Callable:
         @wraps(f)
@@ -518,6 +566,8 @@ def safe_execute(func: Optional[Callable] = None,
                 f, *args, 
                 fallback_value=fallback_value,
                 retry_enabled=retry_enabled,
+                retry_exceptions=retry_exceptions,
+                stop_exceptions=stop_exceptions,
                 **kwargs
             )
         return wrapper
@@ -105,7 +105,7 @@ class CustomJSONLogger:
         self.log_dir = log_dir
 
         self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(os.getenv('XLOG_LEVEL', 'DEBUG').upper())
 
         # Create log directory
         os.makedirs(self.log_dir, exist_ok=True)
@@ -148,6 +148,10 @@ class CustomJSONLogger:
         if log_level is None:
             log_level = logging.DEBUG
 
+        # Skip suppressed levels before any caller inspection or formatting work
+        if not self.logger.isEnabledFor(log_level):
+            return
+
         if category is None:
             category = self.get_caller_script_name()
 
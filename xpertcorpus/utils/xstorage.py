@@ -20,6 +20,10 @@ from xpertcorpus.utils.xlogger import xlogger
 from xpertcorpus.utils.xerror_handler import error_handler, safe_execute
 
 
+# Read size used when hashing stored files
+_HASH_CHUNK_SIZE = 1 << 20
+
+
 class XpertCorpusStorage(ABC):
     """
     Abstract base class for data storage.
@@ -81,7 +85,7 @@ class FileStorage(XpertCorpusStorage):
     File system storage implementation with advanced features.
     
     Features:
-    - Multiple format support (JSON, JSONL, CSV, Parquet, Pickle)
+    - Multiple format support (JSON, JSONL, CSV, Parquet, Pickle; Arrow IPC for reading)
     - Data compression options
     - Streaming support for large files
     - Integrity validation
@@ -164,8 +168,8 @@ class FileStorage(XpertCorpusStorage):
         """Calculate MD5 hash of file for integrity checking."""
         hash_md5 = hashlib.md5()
         try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
+            with open(file_path, "rb", buffering=0) as f:
+                for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
                     hash_md5.update(chunk)
             return hash_md5.hexdigest()
         except Exception as e:
@@ -217,6 +221,9 @@ class FileStorage(XpertCorpusStorage):
                 return pd.read_csv(file_path, encoding='utf-8')
             elif file_type == "parquet":
                 return pd.read_parquet(file_path)
+            elif file_type == "arrow":
+                # Arrow IPC file (Feather V2), e.g. the preprocessed raw corpus
+                return pd.read_feather(file_path)
             elif file_type == "pickle":
                 return pd.read_pickle(file_path)
             else:
@@ -5,16 +5,23 @@ This script is a core utility module for the XpertCorpus project, providing reus
 @date:   2025-08-11
 """
 import os
+import xxhash
+import threading
 
+from typing import List, Optional, Sequence
+from functools import lru_cache
+from collections import OrderedDict
 from transformers import AutoTokenizer
 from xpertcorpus.utils.xlogger import xlogger  # Please import xlogger from `xpertcorpus.utils.xlogger`, not `xpertcorpus.utils`
 
 
+@lru_cache(maxsize=None)
 def get_xtokenizer():
     """
     Get XTokenizer
 
-    Remarks: using ​​Qwen3-8B-tokenizer​​ as the default tokenizer for approximate token counting
+    Remarks: using ​​Qwen3-8B-tokenizer​​ as the default tokenizer for approximate token counting,
+             the tokenizer is loaded once and the same instance is returned on later calls
     """
     # Use internal tokenizer
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -50,10 +57,115 @@ def count_tokens(text: str) -> int:
         xlogger.error("Something wrong with transformer tokenizer, falling back to simple tokenization")
         return len(text.split())
 
+# Maximum number of entries kept by `count_tokens_cached`
+_TOKEN_COUNT_CACHE_SIZE = 4096
+
+# LRU cache of token counts keyed by the 16-byte xxh3-128 digest of the text
+_token_count_cache: "OrderedDict[bytes, int]" = OrderedDict()
+_token_count_cache_lock = threading.Lock()
+
+def count_tokens_cached(text: str) -> int:
+    """
+    Calculate the number of tokens in a string, reusing earlier results for the same text.
+
+    The cache is keyed by a content hash instead of the text itself, so large
+    texts are not kept alive by the cache.
+    
+    Args:
+        text (str): Input text to count tokens from
+        
+    Returns:
+        int: Number of tokens in the text
+    """
+    key = xxhash.xxh3_128_digest(text.encode("utf-8"))
+    with _token_count_cache_lock:
+        tokens = _token_count_cache.get(key)
+        if tokens is not None:
+            _token_count_cache.move_to_end(key)
+            return tokens
+
+    tokens = count_tokens(text)
+    with _token_count_cache_lock:
+        _token_count_cache[key] = tokens
+        if len(_token_count_cache) > _TOKEN_COUNT_CACHE_SIZE:
+            _token_count_cache.popitem(last=False)
+    return tokens
+
+def count_tokens_batch(texts: Sequence[str]) -> List[int]:
+    """
+    Calculate the number of tokens for a batch of strings.
+
+    Uses the fast tokenizer's batch encoding path, which runs in parallel in Rust
+    outside the GIL, so it is much cheaper than calling `count_tokens` once per text.
+    
+    Args:
+        texts (Sequence[str]): Input texts to count tokens from
+        
+    Returns:
+        List[int]: Number of tokens for each text, in input order
+    """
+    if not texts:
+        return []
+    try:
+        # Fast tokenizers: encode in parallel in Rust and take the lengths of the
+        # Encoding objects, without materializing token ids / attention masks as Python lists
+        backend_tokenizer = getattr(xtokenizer, "backend_tokenizer", None)
+        if backend_tokenizer is not None:
+            return [len(encoding) for encoding in backend_tokenizer.encode_batch(list(texts))]
+        return [len(input_ids) for input_ids in xtokenizer(list(texts))["input_ids"]]
+    except ImportError:
+        xlogger.error("Something wrong with transformer tokenizer, falling back to simple tokenization")
+        return [len(text.split()) for text in texts]
+
+# Characters of `\s` in a `str` pattern (the ones `str.split()` splits on), as an RE2 class
+_RE2_WHITESPACE_CLASS = (
+    r"[\t\n\x{b}\x{c}\r\x{1c}-\x{1f} \x{85}\x{a0}\x{1680}\x{2000}-\x{200a}"
+    r"\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}]"
+)
+# The same characters as a plain string, for trimming
+_WHITESPACE_CHARS = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680"
+    + "".join(map(chr, range(0x2000, 0x200B)))
+    + "\u2028\u2029\u202f\u205f\u3000"
+)
+
+def collapse_whitespace_batch(texts: "Sequence[Optional[str]] | pa.Array") -> List[Optional[str]]:
+    """
+    Collapse whitespace runs to single spaces and strip the ends, for a batch of strings.
+
+    Gives the same result as `' '.join(text.split())` per text, but runs inside
+    Arrow's compute kernels over the whole batch when pyarrow is installed.
+    None entries are kept as None.
+    
+    Args:
+        texts (Sequence[Optional[str]] | pa.Array): Input texts, or a pyarrow string array
+        
+    Returns:
+        List[Optional[str]]: Texts with whitespace collapsed, in input order
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return [' '.join(text.split()) if text is not None else None for text in texts]
+
+    array = texts if isinstance(texts, pa.Array) else pa.array(texts, type=pa.large_string())
+    array = pc.replace_substring_regex(array, pattern=_RE2_WHITESPACE_CLASS + "+", replacement=" ")
+    return pc.utf8_trim(array, characters=_WHITESPACE_CHARS).to_pylist()
+
 
 # Run as a script to check the functions: `python -m xpertcorpus.utils.xutils`
 if __name__ == "__main__":
 
     # Test count_tokens
     xlogger.info(f"count_tokens('Hello, world! I am XpertCorpus!'): `{count_tokens('Hello, world! I am XpertCorpus!')}`")
-    xlogger.info(f"count_tokens('你好啊，我是XpertCorpus！'): `{count_tokens('你好啊，我是XpertCorpus！')}`")
\ No newline at end of file
+    xlogger.info(f"count_tokens('你好啊，我是XpertCorpus！'): `{count_tokens('你好啊，我是XpertCorpus！')}`")
+
+    # Test count_tokens_cached
+    xlogger.info(f"count_tokens_cached('Hello, world! I am XpertCorpus!'): `{count_tokens_cached('Hello, world! I am XpertCorpus!')}`")
+
+    # Test count_tokens_batch
+    xlogger.info(f"count_tokens_batch(['Hello, world!', '你好啊！']): `{count_tokens_batch(['Hello, world!', '你好啊！'])}`")
+
+    # Test collapse_whitespace_batch
+    xlogger.info(f"collapse_whitespace_batch([' a   b ', None]): `{collapse_whitespace_batch([' a   b ', None])}`")
\ No newline at end of file